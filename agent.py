@@ -1,28 +1,56 @@
 import torch
 import random
+import time
 import numpy as np
-from collections import deque
 from game_train import MazeGame, Direction, Point
 from model import Linear_QNet, QTrainer
-from helper import plot_reward, plot_bar
+from planner import LookaheadPlanner
+from recorder import EpisodeRecorder
+from dataset import ShardWriter
+from replay import ReplayBuffer, RecordReplayBuffer
+from stats import RollingStats, DecimatedHistory
+import augment
 
 # constants
 MAX_MEMORY = 100000
 BATCH_SIZE = 1000
 LR = 0.001
+GAMMA = 0.9
+HIDDEN_SIZE = 256
+EPSILON_GAMES = 80      # exploration stops after this many games
 
 class Agent:
 
-    def __init__(self):
+    def __init__(self, action_mode='epsilon', lookahead_depth=3, policy_client=None,
+                 lr=LR, gamma=GAMMA, batch_size=BATCH_SIZE, max_memory=MAX_MEMORY,
+                 hidden_size=HIDDEN_SIZE, epsilon_games=EPSILON_GAMES, learner_ranks=1, shared_weights=None, compiled_step=False,
+                 compact_replay=False, verbose=True):
         self.n_games = 0                                               # number of games played
         self.epsilon = 0                                                # controls randomness
-        self.gamma = 0.9                                                # discount factor
-        self.memory = deque(maxlen=MAX_MEMORY)                          # replay memory    
+        self.epsilon_games = epsilon_games                             # games until epsilon reaches 0
+        self.gamma = gamma                                             # discount factor
+        self.batch_size = batch_size                                   # replay sample size
+        self.memory = (RecordReplayBuffer if compact_replay else ReplayBuffer)(max_memory, 288)  # replay memory, game state records if compact
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu") 
-        print(f"Using device: {self.device}")                  
-        self.model = Linear_QNet(288, 256, 4)                          # neural network model
-        self.trainer = QTrainer(self.model, lr=LR, gamma=self.gamma)    # optimizer
+        if verbose:
+            print(f"Using device: {self.device}")
+        self.model = Linear_QNet(288, hidden_size, 4)                  # neural network model
+        self.actor_model = self.model                                  # model used to act, a copy when training is pipelined
+        self.trainer = QTrainer(self.model, lr=lr, gamma=self.gamma, compiled=compiled_step)  # optimizer, compiled fixed-shape step if asked
+        self.learner = self.trainer                                    # runs the train steps
+        if learner_ranks > 1:
+            # every update is sharded across learner processes so their weights stay identical
+            from parallel_learner import DataParallelLearner
+            self.learner = DataParallelLearner(self.trainer, learner_ranks)
         self.game = None                                               # game object
+        self.action_mode = action_mode                                 # 'epsilon' or 'lookahead'
+        self.planner = LookaheadPlanner(lookahead_depth)                # search over game snapshots
+        self.explore = True                                            # use epsilon-greedy exploration
+        self.policy_client = policy_client                             # optional shared PolicyServer connection
+        self.shared_weights = shared_weights                           # optional WeightSubscriber path, acts on published weights
+        if shared_weights:
+            from shared_weights import WeightSubscriber
+            self.shared_weights = WeightSubscriber(Linear_QNet(288, hidden_size, 4), shared_weights)
 
     def get_state(self, game):
         
@@ -32,124 +60,201 @@ class Agent:
 
     # store experience in memory
     def remember(self, state, action, reward, next_state, is_done):
-        self.memory.append((state, action, reward, next_state, is_done))
+        self.memory.push(state, action, reward, next_state, is_done)
 
     # train neural network model
     def train_long_memory(self):
-        # get a random sample of experiences if memory has more than BATCH_SIZE
-        if len(self.memory) > BATCH_SIZE:
-            mini_sample = random.sample(self.memory, BATCH_SIZE)
-        else:
-            mini_sample = self.memory
-
-        # unpack experience
-        states, actions, rewards, next_states, is_dones = zip(*mini_sample)
+        # get a random sample of experiences, or all of them if memory has less than batch_size
+        states, actions, rewards, next_states, is_dones = self.memory.sample(self.batch_size)
 
         # train model
-        self.trainer.train_step(states, actions, rewards, next_states, is_dones)
+        self.learner.train_step(states, actions, rewards, next_states, is_dones)
 
     # train neural network model
     def train_short_memory(self, state, action, reward, next_state, is_done):
-        self.trainer.train_step(state, action, reward, next_state, is_done)
+        self.learner.train_step(state, action, reward, next_state, is_done)
 
     # get action from model using epsilon-greedy policy
     def get_action(self, state):
-        
-        # to explore we need to choose a random action
-        self.epsilon = 80 - self.n_games # set epsilon to decrease as games are played
 
-        action = [0, 0, 0, 0] # initialize action
+        # plan with the game rules, fall back to the model if there's no valid move
+        if self.action_mode == 'lookahead':
+            action = self.planner.get_action(self.game)
+            if action is not None:
+                return action
+
+        # to explore we need to choose a random action
+        self.epsilon = self.epsilon_games - self.n_games # set epsilon to decrease as games are played
 
-        if random.randint(0, 200) < self.epsilon:
+        if self.explore and random.randint(0, 200) < self.epsilon:
             # Explore: Choose a random valid action
             while True:
-                move = random.randint(0, 3)
-                action = [0] * 4
-                action[move] = 1
+                action = random.randint(0, 3)
                 if self.game.is_action_valid(action):  # Check validity before returning
                     break
         else:
-            # Exploit: Get action from model
-            state0 = torch.tensor(state, dtype=torch.float)
-            prediction = self.model(state0) 
-
-            # Find the index of the action with the highest predicted value
-            max_action_index = torch.argmax(prediction).item() 
-
-            # If the predicted action is invalid, choose the second-best action
-            if not self.game.is_action_valid([0, 0, 0, 0, 1][max_action_index]): 
-                # Find the indices of all actions sorted by predicted value
-                sorted_indices = torch.argsort(prediction, descending=True) 
-
-                # Find the first valid action in the sorted order
-                for i in sorted_indices:
-                    action = [0] * 4
-                    action[i.item()] = 1
-                    if self.game.is_action_valid(action):
-                        break
+            # Exploit: Get action from model, or from the policy server when there is one
+            if self.policy_client:
+                prediction = torch.tensor(self.policy_client.predict(state))
+            elif self.shared_weights:
+                prediction = self.shared_weights.predict(torch.tensor(state, dtype=torch.float))
+            else:
+                state0 = torch.tensor(state, dtype=torch.float)
+                prediction = self.actor_model(state0)
+
+            # the valid action with the highest predicted value, the last one tried when none is valid
+            for action in torch.argsort(prediction, descending=True).tolist():
+                if self.game.is_action_valid(action):
+                    break
         return action
 
-def train():
-    plot_scores = []        # list containing scores
-    plot_mean_scores = []   # list containing mean scores
+def take_action(agent, game):
+    """Plays one move of the agent and returns the transition, how the game ended and if the player moved."""
+    trying_count = 0
+    # get current state
+    current_state = agent.get_state(game)
+    # get agent action, 0 is stored when no move is possible
+    agent_action = 0
+    is_action_valid = False
+    while not is_action_valid:
+
+        if game.is_action_impossible() or trying_count > 25:
+            return current_state, agent_action, -100, current_state, True, 5, False
+
+        agent_action = agent.get_action(current_state)
+        is_action_valid = game.is_action_valid(agent_action)
+        if not is_action_valid:
+            game.reward -= -1  # This line might need adjustment based on your game logic
+            trying_count += 1
+
+    # perform agent action
+    reward, is_done, win_condition = game.play_step(agent_action)
+
+    # get new state
+    new_state = agent.get_state(game)
+
+    return current_state, agent_action, reward, new_state, is_done, win_condition, True
+
+def replay_update(agent, telemetry=None, scheduler=None):
+    """One train step on a replay sample, counted by the telemetry and the scheduler."""
+    update_start = time.perf_counter()
+    agent.train_long_memory()
+    if telemetry:
+        telemetry.observe('train_update_seconds', time.perf_counter() - update_start)
+        telemetry.inc('train_updates_total')
+    if scheduler:
+        scheduler.record_update(min(len(agent.memory), agent.batch_size))
+
+def seed_worker(seed):
+    """Seeds a worker process of a pool of runs and keeps it to one thread, the pool already fills every core."""
+    torch.set_num_threads(1)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+def train(action_mode='epsilon', record_file=None, agent=None, render=True, plot=True, save_model=True,
+          verbose=True, max_games=None, max_seconds=None, target_win_rate=None, win_window=100, memory_monitor=None,
+          dataset_dir=None, dataset_shard_size=100000, telemetry=None, scheduler=None, augment_transpose=False,
+          milestones=(), weight_publisher=None):
+    stats = RollingStats(win_window)         # rolling mean, ema and win rate of the last games
+    score_history = DecimatedHistory()      # bounded histories for the plot
+    mean_history = DecimatedHistory()
     plot_wins_losses = [0, 0, 0, 0, 0, 0, 0]    # list containing 4 types od results and wins and losses and ties
-    total_score = 0         # initialize total score
     record = 0              # initialize record
-    agent = Agent()         # initialize agent
-    game = MazeGame()       # initialize game
+    if agent is None:
+        agent = Agent(action_mode)  # initialize agent
+    game = MazeGame(render=render)  # initialize game
     agent.game = game       # set agent game to game
 
-    print("Butter position: ", game.butter)
-    print("Toaster position: ", game.toaster)
+    # plotting needs a gui backend, so it's only imported when used
+    if plot:
+        from helper import plot_reward, plot_bar
 
-    # training loop
-    while True:
-        trying_count = 0
-        # get current state
-        current_state = agent.get_state(game)
-        # get agent action
-        is_action_valid = False
-        is_done = False
-        while not is_action_valid:
+    # record every episode to be replayed later with game_simulator.py --replay
+    recorder = EpisodeRecorder(record_file) if record_file else None
+    if recorder:
+        recorder.start(game.get_layout())
 
-            if game.is_action_impossible() or trying_count > 25:
-                is_done = True
-                win_condition = 5
-                reward = -100
-                break
+    # stream every transition to disk for offline training, see dataset.py
+    dataset = ShardWriter(dataset_dir, dataset_shard_size) if dataset_dir else None
 
-            agent_action = agent.get_action(current_state)
-            is_action_valid = game.is_action_valid(agent_action)
-            if not is_action_valid:
-                game.reward -= -1  # This line might need adjustment based on your game logic
-                trying_count += 1
+    # progress towards the budget and the target win rate
+    start_time = time.perf_counter()
+    n_steps = 0
+    target = None
+    reached = {}            # milestone win rate -> (seconds, games, steps) when first reached
+    augmented = []          # transposed transitions of the current episode
 
+    if verbose:
+        print("Butter position: ", game.butter)
+        print("Toaster position: ", game.toaster)
 
-        if not is_done:
+    # training loop
+    while True:
+        if augment_transpose:
+            before = augment.before_step(game)
+        current_state, agent_action, reward, new_state, is_done, win_condition, has_moved = take_action(agent, game)
 
-            # perform agent action
-            reward, is_done, win_condition = game.play_step(agent_action)
+        if has_moved:
+            n_steps += 1
+            if recorder:
+                recorder.record(agent_action)
 
-            # get new state
-            new_state = agent.get_state(game)
+        if telemetry:
+            telemetry.inc('env_steps_total', has_moved)
 
         # remember experience for short memory
-        agent.train_short_memory(current_state, agent_action, reward, new_state, is_done)
+        # with a scheduler the replay ratio decides every train step instead
+        if scheduler is None:
+            update_start = time.perf_counter()
+            agent.train_short_memory(current_state, agent_action, reward, new_state, is_done)
+            if telemetry:
+                telemetry.observe('train_update_seconds', time.perf_counter() - update_start)
+                telemetry.inc('train_updates_total')
         # remember experience
         agent.remember(current_state, agent_action, reward, new_state, is_done)
+        if dataset:
+            dataset.push(current_state, agent_action, reward, new_state, is_done)
+
+        # the transposed maze gives a second transition for free when the rules commute with it
+        if augment_transpose and has_moved and augment.is_symmetric_transition(game, before):
+            augmented.append(augment.transpose_transition(current_state, agent_action, reward, new_state, is_done))
+
+        if scheduler:
+            scheduler.collect()
+            for _ in range(scheduler.updates_due()):
+                replay_update(agent, telemetry, scheduler)
 
         if is_done:
 
+            # the transposed transitions go in after the episode, as their own run, so they don't
+            # split the episode's chain of shared next states in the replay memory
+            for transition in augmented:
+                agent.remember(*transition)
+            augmented.clear()
+
+            if recorder:
+                recorder.finish(win_condition, reward)
+
              # train long memeory / experience replay
             game.reset(agent.n_games + 1) # reset game state
 
+            if recorder:
+                recorder.start(game.get_layout())
+
             # train long memory
-            agent.train_long_memory()
+            if scheduler is None:
+                replay_update(agent, telemetry)
+
+            # workers acting with Agent(shared_weights=...) pick the new weights up on their next move
+            if weight_publisher:
+                weight_publisher.publish()
 
             # check for new record
             if reward > record:
                 record = reward
-                agent.model.save()
+                if save_model:
+                    agent.model.save()
 
             # check for win condition
             if win_condition == 1:
@@ -173,18 +278,108 @@ def train():
                 text = "Tie"
 
             # print results
-            print(f'Game: {agent.n_games}, Reward: {reward}, Record: {record}, Result: {text}')
+            if verbose:
+                print(f'Game: {agent.n_games}, Reward: {reward}, Record: {record}, Result: {text}')
             # increment number of games played
             agent.n_games += 1
 
             # plot results
-            plot_scores.append(reward)
-            total_score += reward
-            mean_score = total_score / agent.n_games
-            plot_mean_scores.append(mean_score)
-            plot_reward(plot_scores, plot_mean_scores)
-            # plot win condition
-            plot_bar(plot_wins_losses)
+            stats.update(reward, win_condition in (1, 2))
+            score_history.append(reward)
+            mean_history.append(stats.mean)
+            if plot:
+                plot_reward(score_history, mean_history)
+                # plot win condition
+                plot_bar(plot_wins_losses)
+
+            # memory reports and limit, see memstats.MemoryMonitor
+            if memory_monitor:
+                memory_monitor.check(agent, agent.n_games, {'score_history': score_history.values, 'mean_history': mean_history.values})
+
+            # rolling win rate over the last win_window games
+            elapsed = time.perf_counter() - start_time
+            if target is None and target_win_rate is not None and stats.full and stats.win_rate >= target_win_rate:
+                target = (elapsed, agent.n_games, n_steps)
+            for milestone in milestones:
+                if milestone not in reached and stats.full and stats.win_rate >= milestone:
+                    reached[milestone] = (elapsed, agent.n_games, n_steps)
+
+            # live metrics, see telemetry.py
+            if telemetry:
+                telemetry.episode(win_condition)
+                telemetry.set('replay_transitions', len(agent.memory))
+                telemetry.set('replay_capacity', agent.memory.capacity)
+                telemetry.set('epsilon', max(agent.epsilon, 0))
+                telemetry.set('win_rate', stats.win_rate)
+                telemetry.set('mean_reward', stats.mean)
+
+            # stop when the budget is spent
+            if (max_games is not None and agent.n_games >= max_games) or (max_seconds is not None and elapsed >= max_seconds):
+                break
+
+    if recorder:
+        recorder.close()
+    if dataset:
+        dataset.close()
+
+    results = {
+        'games': agent.n_games,
+        'steps': n_steps,
+        'seconds': elapsed,
+        'wins': plot_wins_losses[4],
+        'losses': plot_wins_losses[5],
+        'ties': plot_wins_losses[6],
+        'win_rate': stats.win_rate,
+        'mean_reward': stats.all_time_mean,
+        'record': record,
+        'seconds_to_target': target[0] if target else None,
+        'games_to_target': target[1] if target else None,
+        'steps_to_target': target[2] if target else None,
+    }
+
+    # time, games and steps to each milestone win rate, None when it wasn't reached
+    if milestones:
+        results['milestones'] = {milestone: dict(zip(('seconds', 'games', 'steps'), reached[milestone])) if milestone in reached else None
+                                 for milestone in milestones}
+    return results
+
+
+def evaluate(n_games=100, file_name='./model/model.pth', record_file=None, render=True, dataset_dir=None, shared_weights=None):
+    agent = Agent(shared_weights=shared_weights)    # initialize agent, on the published weights when shared_weights is given
+    if not shared_weights:
+        agent.model.load_state_dict(torch.load(file_name))
+    agent.explore = False           # always follow the model
+    game = MazeGame(render=render)  # initialize game
+    agent.game = game
+
+    recorder = EpisodeRecorder(record_file) if record_file else None
+    dataset = ShardWriter(dataset_dir) if dataset_dir else None
+    results = [0, 0, 0, 0, 0]       # count of each win condition
+
+    for n_game in range(n_games):
+        if recorder:
+            recorder.start(game.get_layout())
+
+        is_done = False
+        while not is_done:
+            current_state, agent_action, reward, new_state, is_done, win_condition, has_moved = take_action(agent, game)
+            if has_moved and recorder:
+                recorder.record(agent_action)
+            if dataset:
+                dataset.push(current_state, agent_action, reward, new_state, is_done)
+
+        if recorder:
+            recorder.finish(win_condition, reward)
+        results[win_condition - 1] += 1
+        game.reset(n_game + 1)
+
+    if recorder:
+        recorder.close()
+    if dataset:
+        dataset.close()
+
+    print(f'Games: {n_games}, Wins: {results[0] + results[1]}, Losses: {results[2] + results[3]}, Ties: {results[4]}')
+    return results
 
 if __name__ == '__main__':
     train()
@@ -0,0 +1,140 @@
+import numpy as np
+import records
+from maze_core import Direction, Point, Layout, state_sections
+
+# transposing the maze, (x, y) -> (y, x), keeps the player start (0, 0) and the mold start (10, 10)
+# and maps every layout to another valid one: horizontal barriers become vertical ones, up <-> left
+# and down <-> right. The rules commute with it except where the mold breaks a tie between equally
+# short moves with its N S W E priority, which transposes to W E N S, so only transitions without
+# such a tie are augmented.
+# The anti-diagonal, (x, y) -> (10 - y, 10 - x), would swap the player and mold starts, which the
+# rules don't treat symmetrically, so it isn't used.
+
+# action up, right, down, left -> transposed action left, down, right, up
+ACTION_PERM = [3, 2, 1, 0]
+
+DIRECTION_MAP = {Direction.RIGHT: Direction.DOWN, Direction.DOWN: Direction.RIGHT,
+                 Direction.LEFT: Direction.UP, Direction.UP: Direction.LEFT}
+
+
+def _state_perm(grid_w=11, grid_h=11):
+    # swaps the x and y of every position in the observation
+    perm = []
+    for _, kind, count in state_sections(grid_w, grid_h):
+        offset = len(perm)
+        if kind == 'pairs':
+            for i in range(count):
+                perm += [offset + 2 * i + 1, offset + 2 * i]
+        else:
+            perm.append(offset)
+    return np.array(perm)
+
+STATE_PERM = _state_perm()
+DIRECTION_INDEX = 2
+
+# direction value -> transposed direction value
+DIRECTION_LUT = np.zeros(max(direction.value for direction in Direction) + 1, dtype=int)
+for _direction, _transposed in DIRECTION_MAP.items():
+    DIRECTION_LUT[_direction.value] = _transposed.value
+
+
+def transpose_state(state):
+    """Observation of the transposed game, for one observation or a batch of them."""
+    state = np.asarray(state)
+    transposed = state[..., STATE_PERM]
+    transposed[..., DIRECTION_INDEX] = DIRECTION_LUT[state[..., DIRECTION_INDEX].astype(int)]
+
+    # get_state lists positions in (x, y) order, the transposed positions are sorted again
+    return records.canonical(transposed).reshape(transposed.shape).astype(transposed.dtype)
+
+
+def transpose_action(action):
+    if isinstance(action, (int, np.integer)):
+        return ACTION_PERM[action]
+    # one-hot list
+    return [action[i] for i in ACTION_PERM]
+
+
+def transpose_transition(state, action, reward, next_state, is_done):
+    return transpose_state(state), transpose_action(action), reward, transpose_state(next_state), is_done
+
+
+def _transpose_point(pos):
+    return None if pos is None else Point(pos[1], pos[0])
+
+
+def transpose_layout(layout):
+    return Layout(_transpose_point(layout.toaster), _transpose_point(layout.butter),
+                  tuple(_transpose_point(barrier) for barrier in layout.barriers))
+
+
+def transpose_snapshot(snapshot):
+    points = lambda positions: type(positions)(_transpose_point(pos) for pos in positions)
+    return snapshot._replace(
+        player=_transpose_point(snapshot.player), prev_player=_transpose_point(snapshot.prev_player),
+        direction=DIRECTION_MAP[snapshot.direction],
+        mold=_transpose_point(snapshot.mold), prev_mold=_transpose_point(snapshot.prev_mold),
+        visited_positions=points(snapshot.visited_positions), known_heat=points(snapshot.known_heat),
+        possible_toaster=points(snapshot.possible_toaster), known_barriers=points(snapshot.known_barriers),
+        possible_butter=points(snapshot.possible_butter), mold_visited=points(snapshot.mold_visited),
+        mold_path=tuple(value for x, y in zip(snapshot.mold_path[::2], snapshot.mold_path[1::2]) for value in (y, x)))
+
+
+def is_symmetric_state(game):
+    """The observation of the transposed game is the transposed observation of this one."""
+    # before the first move the direction is a default, not the last move
+    return game.grid_w == game.grid_h and game.prev_player is not None and not game.is_mold_path_tie(game.mold, game.player)
+
+
+def before_step(game):
+    """What is_symmetric_transition needs to know about the game before a step."""
+    return is_symmetric_state(game), game.mold
+
+
+def is_symmetric_transition(game, before):
+    """The step just played, from the state described by before, commutes with the transpose."""
+    state_symmetric, mold = before
+    return state_symmetric and not game.is_mold_move_tie(mold, game.player) and is_symmetric_state(game)
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    from game_train import MazeGame
+
+    parser = argparse.ArgumentParser(description='Checks that get_state and play_step commute with the transpose')
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = MazeGame(render=False)
+    mirror = MazeGame(render=False)
+    checked, augmented = 0, 0
+    for n_game in range(args.games):
+        game.reset(n_game)
+        mirror.reset(n_game, transpose_layout(game.get_layout()))
+        is_done = False
+        while not is_done:
+            moves = [move for move in range(4) if game.is_action_valid(move)]
+            if not moves:
+                break
+            action = random.choice(moves)
+
+            before = before_step(game)
+            snapshot = game.snapshot()
+            state = game.get_state()
+            reward, is_done, win_condition = game.play_step(action)
+            checked += 1
+            if not is_symmetric_transition(game, before):
+                continue
+
+            # the transposed game, started from the transposed state, sees the transposed
+            # observations and plays the transposed transition
+            mirror.restore(transpose_snapshot(snapshot))
+            assert np.array_equal(mirror.get_state(), transpose_state(state))
+            assert mirror.play_step(transpose_action(action)) == (reward, is_done, win_condition)
+            assert np.array_equal(mirror.get_state(), transpose_state(game.get_state()))
+            augmented += 1
+
+    print(f'Transitions: {checked}, augmentable: {augmented} ({augmented / checked:.0%}), all commute with the transpose')
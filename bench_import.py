@@ -0,0 +1,52 @@
+import argparse
+import subprocess
+import sys
+
+# import time budget in seconds for each module, measured in a fresh interpreter
+BUDGETS = {
+    'maze_core': 0.3,
+    'game_train': 0.3,
+    'planner': 0.05,
+    'recorder': 0.3,
+    'replay': 0.3,
+    'model': 4.0,
+    'agent': 5.0,
+}
+
+# gui stacks that none of these modules may load at import time
+GUI_MODULES = ('pygame', 'matplotlib', 'IPython', 'PyQt5', 'PyQt6', 'PySide6')
+
+SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, ','.join(name for name in {gui} if name in sys.modules))
+"""
+
+
+def measure(module, repeats):
+    # the fastest of several runs, the first ones also pay for cold disk caches
+    best = None
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', SCRIPT.format(module=module, gui=GUI_MODULES)],
+                                capture_output=True, text=True, check=True).stdout.split(' ')
+        elapsed, loaded = float(output[0]), output[1].strip()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, loaded
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Checks that the core modules import fast and without gui stacks')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':>12} {'seconds':>8} {'budget':>7}  gui modules")
+    for module, budget in BUDGETS.items():
+        elapsed, loaded = measure(module, args.repeats)
+        ok = elapsed <= budget and not loaded
+        failed = failed or not ok
+        print(f"{module:>12} {elapsed:>8.3f} {budget:>7.2f}  {loaded or '-'}{'' if ok else '  FAIL'}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,52 @@
+import argparse
+import time
+import numpy as np
+import torch
+from model import Linear_QNet, QTrainer
+from parallel_learner import DataParallelLearner
+
+STATE_SIZE = 288
+
+
+def _random_batch(batch_size):
+    # same shapes and value ranges as a replay sample
+    return (np.random.randint(-1, 11, (batch_size, STATE_SIZE)).astype(np.float32), np.random.randint(0, 4, batch_size),
+            np.random.randint(-100, 150, batch_size).astype(np.float32),
+            np.random.randint(-1, 11, (batch_size, STATE_SIZE)).astype(np.float32),
+            np.random.rand(batch_size) < 0.1)
+
+
+def run(world_size, batch_size, n_updates, threads):
+    torch.manual_seed(0)
+    trainer = QTrainer(Linear_QNet(STATE_SIZE, 256, 4), lr=0.001, gamma=0.9)
+    learner = DataParallelLearner(trainer, world_size, threads) if world_size > 1 else trainer
+    batches = [_random_batch(batch_size) for _ in range(4)]
+
+    # warm up allocations and connections
+    learner.train_step(*batches[0])
+
+    start = time.perf_counter()
+    for i in range(n_updates):
+        learner.train_step(*batches[i % len(batches)])
+    elapsed = time.perf_counter() - start
+
+    in_sync = True
+    if world_size > 1:
+        in_sync = learner.weights_in_sync()
+        learner.close()
+    return n_updates / elapsed, in_sync
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Update throughput of the data-parallel learner versus number of ranks')
+    parser.add_argument('--ranks', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--updates', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=1, help='torch threads per rank')
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    print(f"{'ranks':>5} {'updates/s':>10} {'samples/s':>10}  weights in sync")
+    for world_size in args.ranks:
+        updates, in_sync = run(world_size, args.batch_size, args.updates, args.threads)
+        print(f"{world_size:>5} {updates:>10.1f} {updates * args.batch_size:>10.0f}  {in_sync}")
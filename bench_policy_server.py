@@ -0,0 +1,90 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import torch
+from model import Linear_QNet
+from policy_server import PolicyServer, PolicyClient
+
+# observations have the same size and value range as MazeGame.get_state()
+STATE_SIZE = 288
+
+
+def _run_server(address, max_batch, max_latency):
+    torch.manual_seed(0)
+    server = PolicyServer(Linear_QNet(STATE_SIZE, 256, 4), address, max_batch, max_latency)
+    server.serve_forever()
+
+
+def _run_client(address, n_requests, results):
+    while not os.path.exists(address):
+        time.sleep(0.01)
+    client = PolicyClient(address)
+    states = np.random.randint(-1, 11, size=(n_requests, STATE_SIZE))
+
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        client.predict(state)
+        latencies.append(time.perf_counter() - start)
+    client.close()
+    results.put(latencies)
+
+
+def _run_local(n_requests, results):
+    # baseline: every worker holds its own model and runs batch-of-one forwards
+    torch.set_num_threads(1)
+    model = Linear_QNet(STATE_SIZE, 256, 4)
+    states = np.random.randint(-1, 11, size=(n_requests, STATE_SIZE))
+
+    latencies = []
+    for state in states:
+        start = time.perf_counter()
+        with torch.no_grad():
+            model(torch.tensor(state, dtype=torch.float))
+        latencies.append(time.perf_counter() - start)
+    results.put(latencies)
+
+
+def run(n_clients, n_requests, mode, address, max_batch, max_latency):
+    results = mp.Queue()
+    server = None
+    if mode == 'server':
+        if os.path.exists(address):
+            os.remove(address)
+        server = mp.Process(target=_run_server, args=(address, max_batch, max_latency), daemon=True)
+        server.start()
+        workers = [mp.Process(target=_run_client, args=(address, n_requests, results)) for _ in range(n_clients)]
+    else:
+        workers = [mp.Process(target=_run_local, args=(n_requests, results)) for _ in range(n_clients)]
+
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    latencies = np.concatenate([results.get() for _ in workers])
+    elapsed = time.perf_counter() - start
+
+    for worker in workers:
+        worker.join()
+    if server:
+        server.terminate()
+        server.join()
+
+    return len(latencies) / elapsed, np.percentile(latencies, 50) * 1000, np.percentile(latencies, 99) * 1000
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Throughput and latency of the policy server versus number of clients')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per client')
+    parser.add_argument('--address', default='/tmp/maze-rl-bench.sock')
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-latency', type=float, default=0.002, help='seconds')
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'clients':>7} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for n_clients in args.clients:
+        for mode in ('local', 'server'):
+            throughput, p50, p99 = run(n_clients, args.requests, mode, args.address, args.max_batch, args.max_latency)
+            print(f"{mode:>6} {n_clients:>7} {throughput:>10.0f} {p50:>8.3f} {p99:>8.3f}")
@@ -0,0 +1,47 @@
+import argparse
+import copy
+import time
+import torch
+from model import Linear_QNet, QTrainer
+from bench_parallel_learner import STATE_SIZE, _random_batch
+
+
+def run(trainer, batch_size, n_updates):
+    batches = [_random_batch(batch_size) for _ in range(4)]
+
+    # the first step of each shape compiles, it isn't timed
+    trainer.train_step(*batches[0])
+
+    start = time.perf_counter()
+    for i in range(n_updates):
+        trainer.train_step(*batches[i % len(batches)])
+    return n_updates / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Updates/s of the compiled train step versus eager')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[32, 128, 512, 1024, 4096])
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=None, help='torch threads, all cores by default')
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    # both trainers start from the same weights and must end on the same ones
+    torch.manual_seed(0)
+    model = Linear_QNet(STATE_SIZE, 256, 4)
+    eager = QTrainer(model, lr=0.001, gamma=0.9)
+    compiled = QTrainer(copy.deepcopy(model), lr=0.001, gamma=0.9, compiled=True)
+    batch = _random_batch(1000)
+    for _ in range(3):
+        eager.train_step(*batch)
+        compiled.train_step(*batch)
+    difference = max((a - b).abs().max().item() for a, b in zip(eager.model.parameters(), compiled.model.parameters()))
+    print(f'Largest weight difference after 3 steps: {difference:.2e}')
+
+    print(f"{'batch':>6} {'eager/s':>9} {'compiled/s':>11} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        eager_rate = run(eager, batch_size, args.updates)
+        compiled_rate = run(compiled, batch_size, args.updates)
+        print(f'{batch_size:>6} {eager_rate:>9.1f} {compiled_rate:>11.1f} {compiled_rate / eager_rate:>7.2f}x')
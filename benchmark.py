@@ -0,0 +1,115 @@
+import argparse
+import datetime
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import numpy as np
+from sweep import run_config
+
+# win rates whose time to reach is measured
+MILESTONES = (0.3, 0.5, 0.7)
+
+
+def _run_seed(args):
+    # a sweep run of the default hyperparameters
+    seed, budget, milestones, win_window = args
+    return run_config({'seed': seed}, budget, None, win_window, milestones)
+
+
+def confidence_interval(values, level=0.95, resamples=2000, seed=0):
+    """Bootstrap confidence interval of the mean."""
+    values = np.asarray(values, dtype=float)
+    if len(values) < 2:
+        return (float(values[0]), float(values[0])) if len(values) else (None, None)
+    rng = np.random.default_rng(seed)
+    means = rng.choice(values, size=(resamples, len(values))).mean(axis=1)
+    low, high = np.percentile(means, [(1 - level) / 2 * 100, (1 + level) / 2 * 100])
+    return float(low), float(high)
+
+
+def summarize(runs, milestones):
+    # runs that never reach a milestone are counted apart, the times are over the runs that did
+    summary = {}
+    for milestone in milestones:
+        reached = [run['milestones'][milestone] for run in runs if run['milestones'][milestone] is not None]
+        summary[str(milestone)] = entry = {'reached': len(reached), 'runs': len(runs)}
+        for key in ('seconds', 'steps', 'games'):
+            values = [result[key] for result in reached]
+            entry[key] = {
+                'mean': float(np.mean(values)) if values else None,
+                'median': float(np.median(values)) if values else None,
+                'ci95': confidence_interval(values),
+            }
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark(seeds, budget, milestones=MILESTONES, win_window=100, workers=None):
+    tasks = [(seed, budget, milestones, win_window) for seed in seeds]
+    runs = []
+    with mp.Pool(processes=workers or min(len(tasks), os.cpu_count())) as pool:
+        for run in pool.imap_unordered(_run_seed, tasks):
+            runs.append(run)
+            print(f"[{len(runs)}/{len(tasks)}] seed {run['seed']}: {run['games']} games, {run['steps']} steps, "
+                  f"{run['seconds']:.1f}s, win rate {run['win_rate']:.2f}")
+
+    runs.sort(key=lambda run: run['seed'])
+    return {
+        'commit': _git_commit(),
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'budget': budget,
+        'win_window': win_window,
+        'seeds': list(seeds),
+        'summary': summarize(runs, milestones),
+        'runs': [dict(run, milestones={str(key): value for key, value in run['milestones'].items()}) for run in runs],
+    }
+
+
+def _format(stat):
+    if stat['mean'] is None:
+        return '-'
+    low, high = stat['ci95']
+    return f"{stat['mean']:.1f} [{low:.1f}, {high:.1f}]"
+
+
+def print_summary(result, other=None):
+    print(f"\n{'win rate':>8} {'reached':>8} {'seconds, mean [95% ci]':>26} {'steps, mean [95% ci]':>30}" + ('  seconds vs other' if other else ''))
+    for milestone, entry in result['summary'].items():
+        line = f"{milestone:>8} {entry['reached']:>4}/{entry['runs']:<3} {_format(entry['seconds']):>26} {_format(entry['steps']):>30}"
+        if other and milestone in other['summary']:
+            before = other['summary'][milestone]['seconds']['mean']
+            now = entry['seconds']['mean']
+            line += f"  {(now / before - 1) * 100:+.0f}%" if before and now else '  -'
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time and steps to reach rolling win rates over several seeds')
+    parser.add_argument('--seeds', type=int, default=5, help='number of seeds, run in parallel')
+    parser.add_argument('--games', type=int, default=2000, help='budget in games per seed')
+    parser.add_argument('--seconds', type=float, default=None, help='budget in seconds per seed')
+    parser.add_argument('--milestones', type=float, nargs='+', default=list(MILESTONES))
+    parser.add_argument('--win-window', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default='benchmark.json')
+    parser.add_argument('--compare', help='earlier benchmark json to compare with')
+    args = parser.parse_args()
+
+    result = benchmark(range(args.seeds), {'games': args.games, 'seconds': args.seconds},
+                       tuple(args.milestones), args.win_window, args.workers)
+    with open(args.out, 'w') as file:
+        json.dump(result, file, indent=2)
+
+    other = None
+    if args.compare:
+        with open(args.compare) as file:
+            other = json.load(file)
+    print_summary(result, other)
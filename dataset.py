@@ -0,0 +1,225 @@
+import glob
+import os
+import queue
+import threading
+import time
+import numpy as np
+import torch
+from model import Linear_QNet, QTrainer
+
+# a dataset is a directory of shards, shard-00000.npz, shard-00001.npz, ...
+# each shard holds the transitions column by column, observations in int8 with the
+# last wide_columns features (the running reward) in int16, like the replay memory
+FIELDS = ('state', 'state_wide', 'next_state', 'next_state_wide', 'action', 'reward', 'done')
+
+
+def list_shards(directory):
+    return sorted(glob.glob(os.path.join(directory, 'shard-*.npz')))
+
+
+class ShardWriter:
+    """Streams transitions to fixed-size shards on disk, same arguments as Agent.remember."""
+
+    def __init__(self, directory, shard_size=100000, state_size=288, wide_columns=1):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self.narrow = state_size - wide_columns
+
+        # new shards go after the ones already there, so several runs add to one dataset
+        self.n_shards = len(list_shards(directory))
+        self.count = 0
+
+        self.columns = {
+            'state': np.zeros((shard_size, self.narrow), dtype=np.int8),
+            'state_wide': np.zeros((shard_size, wide_columns), dtype=np.int16),
+            'next_state': np.zeros((shard_size, self.narrow), dtype=np.int8),
+            'next_state_wide': np.zeros((shard_size, wide_columns), dtype=np.int16),
+            'action': np.zeros(shard_size, dtype=np.int8),
+            'reward': np.zeros(shard_size, dtype=np.int32),
+            'done': np.zeros(shard_size, dtype=bool),
+        }
+        self.size = 0   # transitions in the shard being filled
+
+    def push(self, state, action, reward, next_state, is_done):
+        state, next_state = np.asarray(state), np.asarray(next_state)
+        columns, i = self.columns, self.size
+        columns['state'][i] = state[:self.narrow]
+        columns['state_wide'][i] = state[self.narrow:]
+        columns['next_state'][i] = next_state[:self.narrow]
+        columns['next_state_wide'][i] = next_state[self.narrow:]
+        columns['action'][i] = action if np.ndim(action) == 0 else np.argmax(action)
+        columns['reward'][i] = reward
+        columns['done'][i] = is_done
+        self.size += 1
+        self.count += 1
+
+        if self.size == self.shard_size:
+            self.flush()
+
+    def flush(self):
+        if self.size == 0:
+            return
+        file_name = os.path.join(self.directory, f'shard-{self.n_shards:05d}.npz')
+
+        # written under a temporary name so a reader never sees half a shard
+        temp_name = file_name + '.tmp'
+        with open(temp_name, 'wb') as file:
+            np.savez(file, **{name: column[:self.size] for name, column in self.columns.items()})
+        os.replace(temp_name, file_name)
+
+        self.n_shards += 1
+        self.size = 0
+
+    def close(self):
+        self.flush()
+
+
+def _read_shards(shards, epochs, rng, out):
+    try:
+        for _ in range(epochs):
+            for i in rng.permutation(len(shards)):
+                with np.load(shards[i]) as data:
+                    out.put({name: data[name] for name in FIELDS})
+        out.put(None)
+    except Exception as error:
+        out.put(error)
+
+
+class ShardLoader:
+    """Iterates over shuffled batches of a dataset that doesn't have to fit in memory.
+
+    A background thread reads up to read_ahead shards ahead, in a random order each epoch.
+    Transitions then go through a shuffle buffer of shuffle_buffer rows: every incoming
+    transition takes the slot of a random one, which is emitted. Only the buffer and the
+    shards read ahead are in memory. Batches have the layout of ReplayBuffer.sample, so
+    they go straight to QTrainer.train_step.
+    """
+
+    def __init__(self, directory, batch_size=1000, shuffle_buffer=100000, read_ahead=2, epochs=1, seed=None):
+        self.shards = list_shards(directory)
+        if not self.shards:
+            raise FileNotFoundError(f"No shards in '{directory}'")
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.read_ahead = read_ahead
+        self.epochs = epochs
+        self.rng = np.random.default_rng(seed)
+        self.wait_seconds = 0.0     # time spent waiting for the reader
+
+    def __iter__(self):
+        shards = queue.Queue(maxsize=self.read_ahead)
+        reader = threading.Thread(target=_read_shards, args=(self.shards, self.epochs, np.random.default_rng(self.rng.integers(2**32)), shards), daemon=True)
+        reader.start()
+
+        pool, pool_size = None, 0
+        pending, pending_start = None, 0
+
+        while True:
+            if pending is None or pending_start == len(pending['action']):
+                start = time.perf_counter()
+                pending = shards.get()
+                self.wait_seconds += time.perf_counter() - start
+                pending_start = 0
+                if pending is None:
+                    break
+                if isinstance(pending, Exception):
+                    raise pending
+
+            # fill the pool first
+            if pool_size < self.shuffle_buffer:
+                if pool is None:
+                    pool = {name: np.zeros((self.shuffle_buffer,) + column.shape[1:], dtype=column.dtype) for name, column in pending.items()}
+                n = min(self.shuffle_buffer - pool_size, len(pending['action']) - pending_start)
+                for name in FIELDS:
+                    pool[name][pool_size:pool_size + n] = pending[name][pending_start:pending_start + n]
+                pool_size += n
+                pending_start += n
+                continue
+
+            # every incoming transition replaces a random one of the pool, which is emitted
+            n = min(self.batch_size, len(pending['action']) - pending_start)
+            slots = self.rng.choice(pool_size, size=n, replace=False)
+            batch = {name: pool[name][slots] for name in FIELDS}
+            for name in FIELDS:
+                pool[name][slots] = pending[name][pending_start:pending_start + n]
+            pending_start += n
+            yield self._to_batch(batch)
+
+        # drain the pool
+        if pool_size:
+            order = self.rng.permutation(pool_size)
+            for i in range(0, pool_size, self.batch_size):
+                slots = order[i:i + self.batch_size]
+                yield self._to_batch({name: pool[name][slots] for name in FIELDS})
+
+    def _to_batch(self, batch):
+        return (np.concatenate([batch['state'], batch['state_wide']], axis=1).astype(np.float32), batch['action'].astype(np.int64),
+                batch['reward'].astype(np.float32),
+                np.concatenate([batch['next_state'], batch['next_state_wide']], axis=1).astype(np.float32),
+                batch['done'])
+
+
+def train_offline(directory, model=None, epochs=1, batch_size=1000, lr=0.001, gamma=0.9, hidden_size=256,
+                  shuffle_buffer=100000, read_ahead=2, save_file='model_offline.pth', verbose=True):
+    """Trains a Linear_QNet on a recorded dataset without playing any game."""
+    if model is None:
+        model = Linear_QNet(288, hidden_size, 4)
+    trainer = QTrainer(model, lr=lr, gamma=gamma)
+    loader = ShardLoader(directory, batch_size, shuffle_buffer, read_ahead, epochs)
+
+    start = time.perf_counter()
+    updates, samples = 0, 0
+    for batch in loader:
+        trainer.train_step(*batch)
+        updates += 1
+        samples += len(batch[1])
+        if verbose and updates % 100 == 0:
+            print(f'Updates: {updates}, Samples: {samples}, {samples / (time.perf_counter() - start):.0f} samples/s')
+
+    elapsed = time.perf_counter() - start
+    if save_file:
+        model.save(save_file)
+    stats = {
+        'updates': updates,
+        'samples': samples,
+        'seconds': elapsed,
+        'samples_per_second': samples / elapsed,
+        # share of the time the trainer waited for the disk
+        'io_wait': loader.wait_seconds / elapsed,
+    }
+    if verbose:
+        print(', '.join(f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}' for key, value in stats.items()))
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Record transition datasets and train on them offline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    collect = commands.add_parser('collect', help='play headless training games and record their transitions')
+    collect.add_argument('directory')
+    collect.add_argument('--games', type=int, default=1000)
+    collect.add_argument('--shard-size', type=int, default=100000)
+
+    offline = commands.add_parser('train', help='train a new model on a dataset')
+    offline.add_argument('directory')
+    offline.add_argument('--epochs', type=int, default=1)
+    offline.add_argument('--batch-size', type=int, default=1000)
+    offline.add_argument('--shuffle-buffer', type=int, default=100000)
+    offline.add_argument('--read-ahead', type=int, default=2, help='shards read ahead by the background thread')
+    offline.add_argument('--hidden-size', type=int, default=256)
+    offline.add_argument('--out', default='model_offline.pth', help='file name in ./model')
+    args = parser.parse_args()
+
+    if args.command == 'collect':
+        from agent import Agent, train
+        train(agent=Agent(verbose=False), render=False, plot=False, save_model=False, verbose=False,
+              max_games=args.games, dataset_dir=args.directory, dataset_shard_size=args.shard_size)
+        print(f'Shards in {args.directory}: {len(list_shards(args.directory))}')
+    else:
+        torch.set_num_threads(max(1, (os.cpu_count() or 2) - 1))    # one core for the reader
+        train_offline(args.directory, epochs=args.epochs, batch_size=args.batch_size, hidden_size=args.hidden_size,
+                      shuffle_buffer=args.shuffle_buffer, read_ahead=args.read_ahead, save_file=args.out)
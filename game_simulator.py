@@ -1,136 +1,32 @@
 import pygame
-import random
-from enum import Enum
-from collections import namedtuple
-import numpy as np
+from maze_core import MazeCore, UP, RIGHT, DOWN, LEFT
+from renderer import PygameRenderer
 
 # initialize the pygame
 pygame.init()
 
-# RGB colors
-WHITE = (255, 255, 255)
-RED = (200, 0, 0)
-LIGHT_RED = (150, 50, 50)
-BLUE = (0, 0, 200)
-GREEN = (0, 200, 0)
-BLACK = (0, 0, 0)
-YELLOW = (200, 200, 0)
+# arrow keys and the action they play
+KEY_ACTIONS = {
+    pygame.K_UP: UP,
+    pygame.K_RIGHT: RIGHT,
+    pygame.K_DOWN: DOWN,
+    pygame.K_LEFT: LEFT,
+}
 
-class Direction(Enum):
-    RIGHT = 1
-    LEFT = 2
-    UP = 3
-    DOWN = 4
-
-# Point
-Point = namedtuple('Point', 'x, y')
-
-# Game settings
-OFF_SET = 10
-GRID_SIZE = 50
-FPS = 60
-
-class MazeGame:
-
-    def __init__(self, grid_w = 11, grid_h = 11):
-        
-        # initialize grid
-        self._initialize_grid(grid_w, grid_h)
-
-        # initialize positions
-        self._initialize_positions(grid_w, grid_h)
-
-        # initialize what player knows of the game
-        self._initialize_game_state()
-
-        
-    def _initialize_grid(self, grid_w, grid_h):
-        # init display
-        self.w = GRID_SIZE * (grid_w + 1) + 2*OFF_SET
-        self.h = GRID_SIZE * (grid_h + 1) + 2*OFF_SET
-        self.grid_w = grid_w
-        self.grid_h = grid_h
-        self.display = pygame.display.set_mode((self.w, self.h))
-        pygame.display.set_caption("Maze Game")
-        self.clock = pygame.time.Clock()
-
-    def _initialize_positions(self, grid_w, grid_h):
-        
-        # valid positions for everyone
-        self.valid_positions = [Point(x, y) for x in range(0, grid_w, 2) for y in range(0, grid_h, 2)]
-
-        # toaster position
-        #self.toaster = random.choice(self.valid_positions)
-        self.toaster = Point(2,0)
-        self.toaster_heat = [(self.toaster.x + 2, self.toaster.y), (self.toaster.x - 2, self.toaster.y), (self.toaster.x, self.toaster.y + 2), (self.toaster.x, self.toaster.y - 2)]
-
-        # butter positions
-        #self.butter = random.choice(self.valid_positions)
-        self.butter = Point(2, 10)
-
-        # valid positions for barriers
-        self.valid_barriers = set(Point(x, y) for x in range(grid_w) for y in range(grid_h) if (x % 2 != 0) != (y % 2 != 0))
-        self.barriers = []
-
-        # add barriers to test
-        self.barriers.append(Point(0, 1))
-        self.barriers.append(Point(3, 0))
-
-    def _initialize_game_state(self):
-
-        self.score = 0
-
-        # init player position
-        self.player = Point(0, 0)
-
-        # set player direction
-        self.direction = Direction.RIGHT
-
-        # mold position
-        self.mold = Point(10,10)
-
-        # set player visited positions
-        self.visited_positions = set()
-        self.visited_positions.add(self.player)
-
-        # known heat positions
-        self.known_heat = set()
-
-        # know toaster position
-        self.know_toaster = False
-
-        # plaeyr waiting on toaster
-        self.player_wait = False
-
-        # possible positions of the toaster
-        self.possible_toaster = self.valid_positions.copy()
-
-        # set player known barriers
-        self.known_barriers = set()
-
-        # possible possitions of the butter
-        self.distances = self._calculate_distances()
-        self.possible_butter = self._init_possible_butter()
-
-        # visited mold positions
-        self.mold_visited = set()
-        self.mold_visited.add(self.mold)
-
-        # mold path
-        self.mold_path = []
+class MazeGame(MazeCore):
+    """Human front-end of the maze rules: the arrow keys choose the moves."""
 
+    def __init__(self, grid_w = 11, grid_h = 11, layout = None, max_frames = None):
+        super().__init__(grid_w, grid_h, PygameRenderer(grid_w, grid_h), max_frames, layout)
 
     def play_step(self):
 
-        # reveal barriers on player position
-        self._reveal_barriers()
-
         # update ui and clock
         self._update_ui()
 
-        # 1. collect user input
-        has_decided = False
-        while has_decided == False:
+        # 1. collect user input, moves into a barrier or off the grid are ignored
+        action = None
+        while action is None:
 
             pygame.event.clear()
             event = pygame.event.wait()
@@ -140,285 +36,98 @@ class MazeGame:
                 quit()
 
             if event.type == pygame.KEYUP:
-                if event.key == pygame.K_UP:
-                    if (Point(self.player.x, self.player.y - 1) not in self.known_barriers) and (Point(self.player.x, self.player.y - 2) in self.valid_positions):
-                        self.direction = Direction.UP
-                        has_decided = True
-                if event.key == pygame.K_DOWN:
-                    if (Point(self.player.x, self.player.y + 1) not in self.known_barriers) and (Point(self.player.x, self.player.y + 2) in self.valid_positions):
-                        self.direction = Direction.DOWN
-                        has_decided = True
-                if event.key == pygame.K_LEFT:
-                    if (Point(self.player.x - 1, self.player.y) not in self.known_barriers) and (Point(self.player.x - 2, self.player.y) in self.valid_positions):
-                        self.direction = Direction.LEFT
-                        has_decided = True
-                if event.key == pygame.K_RIGHT:
-                    if (Point(self.player.x + 1, self.player.y) not in self.known_barriers) and (Point(self.player.x + 2, self.player.y) in self.valid_positions):
-                        self.direction = Direction.RIGHT
-                        has_decided = True
+                if event.key in KEY_ACTIONS and self.is_action_valid(KEY_ACTIONS[event.key]):
+                    action = KEY_ACTIONS[event.key]
 
                 # exit game
                 if event.key == pygame.K_ESCAPE:
                     pygame.quit()
                     quit()
-            
-            if (has_decided):
-                break
-
-        # 2. move
-        self._move()
-
-        self._update_state()
-
-        # 3. check if game over
-        game_over = False
-        if self._is_game_over():
-            game_over = True
-            return game_over, self.score
-
-        # 4. update ui and clock
-        self._update_ui()
-
-        # 5. return game over and score
-        return game_over, self.score
-    
-    def _calculate_distances(self):
-        distances = np.zeros((self.grid_w, self.grid_h))
-        for x in range(self.grid_w):
-            for y in range(self.grid_h):
-                if x % 2 == 0 and y % 2 == 0:
-                    distances[x, y] = int(self._get_distance(Point(x, y), self.butter)/2)
-                else:
-                    distances[x, y] = -1
-        return distances
-    
-    def _reveal_barriers(self):
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        for direction in directions:
-            if Point(self.player.x + direction[0], self.player.y + direction[1]) in self.barriers:
-                self.known_barriers.add(Point(self.player.x + direction[0], self.player.y + direction[1]))
-    
-    def _move(self):
-
-        if (self.player_wait == False):
-            if self.direction == Direction.RIGHT:
-                self.player = Point(self.player.x + 2, self.player.y)
-            if self.direction == Direction.LEFT:
-                self.player = Point(self.player.x - 2, self.player.y)
-            if self.direction == Direction.UP:
-                self.player = Point(self.player.x, self.player.y - 2)
-            if self.direction == Direction.DOWN:
-                self.player = Point(self.player.x, self.player.y + 2)
-
-            # add player to visited positions
-            self.visited_positions.add(self.player)
-
-        # move mold
-        self._move_mold()
 
-        if (self.player == self.toaster and self.player_wait == True):
-            self.player_wait = False
-        elif (self.player == self.toaster and self.player_wait == False):
-            self.player_wait = True
+        # 2. move with the same rules as training
+        reward, game_over, _ = super().play_step(action)
 
-        
+        # 3. return game over and score
+        return game_over, reward
 
-    def _move_mold(self):
+# replay speed in steps per second at speed 1
+REPLAY_STEPS_PER_SECOND = 4
 
-        # mold has priority of moving of N S E W
-        # check wich direction is the shortest to the player
-        dist_up = self._get_distance(Point(self.mold.x, self.mold.y - 2), self.player)
-        dist_down = self._get_distance(Point(self.mold.x, self.mold.y + 2), self.player)
-        dist_left = self._get_distance(Point(self.mold.x - 2, self.mold.y), self.player)
-        dist_right = self._get_distance(Point(self.mold.x + 2, self.mold.y), self.player)
+def _wait_replay(seconds, controls):
 
-        # choose the shortest distance
-        if dist_up <= dist_down and dist_up <= dist_left and dist_up <= dist_right:
-            if (self.mold.y > 0):
-                self.mold = Point(self.mold.x, self.mold.y - 2)
-        elif dist_down <= dist_up and dist_down <= dist_left and dist_down <= dist_right:
-            if (self.mold.y < self.grid_h - 1):
-                self.mold = Point(self.mold.x, self.mold.y + 2)
-        elif dist_left <= dist_up and dist_left <= dist_down and dist_left <= dist_right:
-            if (self.mold.x > 0):
-                self.mold = Point(self.mold.x - 2, self.mold.y)
-        elif dist_right <= dist_up and dist_right <= dist_down and dist_right <= dist_left:
-            if (self.mold.x < self.grid_w - 1):
-                self.mold = Point(self.mold.x + 2, self.mold.y)
-
-        # add mold to visited positions
-        self.mold_visited.add(self.mold)
-
-        self.mold_path = self._get_mold_path(self.mold, self.player)
-
-    def _get_mold_path(self, start, end):
-        
-        mold_x, mold_y = start
-        player_x, player_y = end
-
-        path = []
-
-        # mold needs to go to the same row as the player before moving inside/outside
-        while mold_y != player_y:
-            if mold_y < player_y:
-                mold_y += 2
-            else:
-                mold_y -= 2
-            path.append(Point(mold_x, mold_y))
-
-        # now that mold is in the same row as the player it needs to go to the same column
-        while mold_x != player_x:
-            if mold_x < player_x:
-                mold_x += 2
-            else:
-                mold_x -= 2
-            path.append(Point(mold_x, mold_y))
-
-        return path
-    
-    def _update_state(self):
-        self._remove_possible_toaster()
-        self._remove_possible_butter()
-
-
-    def _remove_possible_toaster(self):
-
-        # if player is in toaster heat we can remove some positions
-        if self.player in self.toaster_heat:
-            self.known_heat.add(self.player)
-
-        # remove current player position from possible toaster positions
-        if self.player in self.possible_toaster and self.player != self.toaster:
-            self.possible_toaster.remove(self.player)
-
-        # remove mold position from possible toaster positions
-        if self.mold in self.possible_toaster and self.mold != self.toaster:
-            self.possible_toaster.remove(self.mold)
-
-        if self.player == self.toaster:
-            self.know_toaster = True
-            self.possible_toaster = [self.toaster]
-
-        # if there's more than one possible toaster position we can remove some positions
-        if len(self.possible_toaster) > 1:
-            copy_possible_toaster = self.possible_toaster.copy()
-            
-            # remove positions that are not 2 distance from the heat
-            for (x, y) in copy_possible_toaster:
-                for heat in self.known_heat:
-                    if (self._get_distance(Point(heat[0], heat[1]), Point(x, y)) != 2 and (x, y) in self.possible_toaster):
-                        self.possible_toaster.remove(Point(x, y))
-
-        # if there's only one possible toaster position we can know the toaster position
-        if (len(self.possible_toaster) == 1) and self.know_toaster == False:
-            self.know_toaster = True
-
-    def _init_possible_butter(self):
-        possible_butter = []
-
-        for (x, y) in self.valid_positions:
-            if (x + y) == 2*self.distances[0][0]:
-                possible_butter.append(Point(x, y))
-
-        return possible_butter
-    
-    def _remove_possible_butter(self):
-        possible_butter = self.possible_butter.copy()
-        for (x, y) in possible_butter:
-            if (self._get_distance(Point(x, y), self.player) != 2 * self.distances[self.player.x, self.player.y]) or (x,y) in self.mold_visited:
-                self.possible_butter.remove(Point(x, y))
-                
-    def _get_distance(self, p1, p2):
-        return abs(p1.x - p2.x) + abs(p1.y - p2.y)
-
-    def _is_game_over(self):
-
-        # if player hits butter player wins
-        if self.player == self.butter:
-            self.display.fill(BLACK)
-            text = pygame.font.Font(None, 36).render("You Win: player reached butter!", True, WHITE)
-            self.display.blit(text, (self.w/4, self.h/4))
-            pygame.display.flip()
-            return True
-        # if mold hits toaster player wins
-        elif self.mold == self.toaster:
-            self.display.fill(BLACK)
-            text = pygame.font.Font(None, 36).render("You Win: mold reached toaster!", True, WHITE)
-            self.display.blit(text, (self.w/4, self.h/4))
-            pygame.display.flip()
-            return True
-            
-        # if player hits mold player loses
-        elif self.player == self.mold:
-            self.display.fill(BLACK)
-            text = pygame.font.Font(None, 36).render("You Lose: player reached mold!", True, WHITE)
-            self.display.blit(text, (self.w/4, self.h/4))
-            pygame.display.flip()
-            return True
-            
-        # if mold hits butter player loses
-        elif self.mold == self.butter:
-            self.display.fill(BLACK)
-            text = pygame.font.Font(None, 36).render("You Lose: mold reached butter!", True, WHITE)
-            self.display.blit(text, (self.w/4, self.h/4))
-            pygame.display.flip()
-            return True
-        
-        return False
-            
-        
-        
-    def _update_ui(self):
-
-        self.display.fill(BLACK)
-
-        # draw lines
-        for x in range(0, int((self.grid_w + 1) / 2) + 1, 1):
-            pygame.draw.line(self.display, WHITE, (x * GRID_SIZE * 2 + OFF_SET, 0 + OFF_SET), (x * GRID_SIZE * 2 + OFF_SET, self.h - OFF_SET), 2)
-        for y in range(0, int((self.grid_h + 1) / 2) + 1, 1): 
-            pygame.draw.line(self.display, WHITE, (0 + OFF_SET, y * GRID_SIZE * 2 + OFF_SET), (self.w - OFF_SET, y * GRID_SIZE * 2 + OFF_SET), 2)
-
-        # draw toaster heat if is discovered
-        for pos in self.known_heat:
-            pygame.draw.rect(self.display, LIGHT_RED, (pos.x * GRID_SIZE + 2*OFF_SET, pos.y * GRID_SIZE + 2*OFF_SET, GRID_SIZE * 2 - 2*OFF_SET, GRID_SIZE * 2 - 2*OFF_SET))
-
-         # draw possible butter positions
-        for pos in self.possible_butter:
-            pygame.draw.rect(self.display, YELLOW, (pos.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), pos.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
-
-        # draw player
-        pygame.draw.rect(self.display, GREEN, (self.player.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), self.player.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
-
-        # draw mold
-        pygame.draw.rect(self.display, BLUE, (self.mold.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), self.mold.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
-
-        # draw toaster
-        if self.know_toaster:
-            text_letter = pygame.font.Font(None, 36).render("T", True, WHITE)
-            self.display.blit(text_letter, (self.toaster.x * GRID_SIZE + 2*GRID_SIZE - 2*OFF_SET, self.toaster.y * GRID_SIZE + OFF_SET * 2))
-
-        # draw known barriers
-        for barrier in self.known_barriers:
-            # check if is an horizontal barrier or a vertical barrier
-            if barrier.x % 2 == 0:
-                pygame.draw.line(self.display, RED, (barrier.x * GRID_SIZE + OFF_SET, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE), (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE * 2, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE), 10)
-            else:
-                pygame.draw.line(self.display, RED, (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE, barrier.y * GRID_SIZE + OFF_SET), (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE * 2), 10)
-
-        # draw heuristic (distances to butter)
-        for x in range(self.grid_w):
-            for y in range(self.grid_h):
-                if self.distances[x, y] != -1 and Point(x, y) in self.visited_positions:
-                    text_number = pygame.font.Font(None, 36).render(str(int(self.distances[x, y])), True, YELLOW)
-                    self.display.blit(text_number, (x * GRID_SIZE + OFF_SET * 2, y * GRID_SIZE + OFF_SET * 2))
+    # keep reading the keyboard while waiting so the replay stays responsive
+    deadline = pygame.time.get_ticks() + int(seconds * 1000)
+    while pygame.time.get_ticks() < deadline or controls['paused']:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                quit()
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_ESCAPE:
+                    pygame.quit()
+                    quit()
+                if event.key == pygame.K_SPACE:
+                    controls['paused'] = not controls['paused']
+                if event.key == pygame.K_UP:
+                    controls['speed'] *= 2
+                if event.key == pygame.K_DOWN:
+                    controls['speed'] /= 2
+                if event.key == pygame.K_RIGHT:
+                    controls['seek'] = 1
+                    return
+                if event.key == pygame.K_LEFT:
+                    controls['seek'] = -1
+                    return
+        pygame.time.wait(5)
+
+def replay(file_name, episode=0, speed=1.0):
+
+    # recorded games are played back through the rules, the replay controls its own timing
+    from recorder import load_episodes, replay as replay_episode
+
+    episodes = load_episodes(file_name)
+    game = MazeCore(renderer=PygameRenderer(fps=0))
+
+    # arrows left/right seek episodes, up/down change speed, space pauses
+    controls = {'speed': speed, 'paused': False, 'seek': 0}
+    index = episode
+    while 0 <= index < len(episodes):
+        controls['seek'] = 0
+        for _ in replay_episode(game, episodes[index], index):
+            _wait_replay(1 / (REPLAY_STEPS_PER_SECOND * controls['speed']), controls)
+            if controls['seek']:
+                break
 
-        pygame.display.flip()
+        if not controls['seek']:
+            _wait_replay(4 / (REPLAY_STEPS_PER_SECOND * controls['speed']), controls)
+        index = max(0, index + controls['seek']) if controls['seek'] else index + 1
 
-        self.clock.tick(FPS)
-        
+    pygame.quit()
 
 if __name__ == "__main__":
-    game = MazeGame()
+    import argparse
+    import random
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--replay', help='file with recorded episodes to play back')
+    parser.add_argument('--episode', type=int, default=0, help='index of the first episode to play back, or of the layout to play')
+    parser.add_argument('--speed', type=float, default=1.0, help='playback speed multiplier')
+    parser.add_argument('--layout-from', help='play the maze of a recorded episode (recorder or solver file)')
+    parser.add_argument('--seed', type=int, default=None, help='seed of the random maze')
+    parser.add_argument('--max-frames', type=int, default=None, help='tie after this many moves, training uses 25')
+    args = parser.parse_args()
+
+    if args.replay:
+        replay(args.replay, args.episode, args.speed)
+        quit()
+
+    layout = None
+    if args.layout_from:
+        from recorder import load_episodes, get_layout
+        layout = get_layout(load_episodes(args.layout_from)[args.episode])
+    random.seed(args.seed)
+
+    game = MazeGame(layout=layout, max_frames=args.max_frames)
     
     # Game loop
     while True:
@@ -1,28 +1,49 @@
-import matplotlib
-import matplotlib.pyplot as plt
+import os
 import numpy as np
-from IPython import display
-matplotlib.use("QtAgg")
-plt.ion()
 
-fig_reward, ax_reward = plt.subplots()
-fig_bar, ax_bar = plt.subplots()
+# matplotlib and the figures are only created on the first plot
+plt = None
+fig_reward, ax_reward = None, None
+fig_bar, ax_bar = None, None
+
+def _init_plots():
+    """Loads matplotlib with an interactive backend and creates the figures."""
+    global plt, fig_reward, ax_reward, fig_bar, ax_bar
+    if plt is not None:
+        return
+
+    import matplotlib
+    if 'MPLBACKEND' not in os.environ:
+        matplotlib.use("QtAgg")
+    import matplotlib.pyplot as pyplot
+    plt = pyplot
+    plt.ion()
+
+    fig_reward, ax_reward = plt.subplots()
+    fig_bar, ax_bar = plt.subplots()
 
 def plot_reward(scores, mean_scores):
-    """Plots the training progress with scores and mean scores."""
+    """Plots the training progress from the decimated score and rolling mean histories."""
+    _init_plots()
     ax_reward.clear() 
     #ax_reward.title('Training...')
     ax_reward.set_xlabel('Number of games')
     ax_reward.set_ylabel('Score')
-    ax_reward.plot(scores)
-    ax_reward.plot(mean_scores)
-    ax_reward.text(len(scores) - 1, scores[-1], str(scores[-1]))
-    ax_reward.text(len(mean_scores) - 1, mean_scores[-1], str(mean_scores[-1]))
+
+    # every point covers scores.stride games, the band shows their spread
+    x, values, low, high = scores.points()
+    ax_reward.fill_between(x, low, high, alpha=0.2)
+    ax_reward.plot(x, values)
+    mean_x, mean_values, _, _ = mean_scores.points()
+    ax_reward.plot(mean_x, mean_values)
+    ax_reward.text(x[-1], values[-1], f'{values[-1]:.1f}')
+    ax_reward.text(mean_x[-1], mean_values[-1], f'{mean_values[-1]:.1f}')
     plt.show(block=False)
     fig_reward.savefig('plot_reward.png')
 
 def plot_bar(data):
     """Plots a bar graph for the provided data."""
+    _init_plots()
     ax_bar.clear()
 
     # Extract categories from data labels (assuming labels are present)
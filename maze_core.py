@@ -0,0 +1,736 @@
+import random
+from enum import Enum
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+# rules of the maze game without any drawing, shared by the training environment
+# (game_train.py) and the human simulator (game_simulator.py); drawing is done by an
+# optional renderer, see renderer.py
+
+class Direction(Enum):
+    RIGHT = 1
+    LEFT = 2
+    UP = 3
+    DOWN = 4
+
+class WinCondition(Enum):
+    PLAYER_HIT_BUTTER = 1
+    MOLD_HIT_TOASTER = 2
+    MOLD_HIT_PLAYER = 3
+    MOLD_HIT_BUTTER = 4
+
+# Point
+Point = namedtuple('Point', 'x, y')
+
+# actions are small integers, the index of the one-hot [up, right, down, left] they replace
+UP, RIGHT, DOWN, LEFT = range(4)
+ACTIONS = (UP, RIGHT, DOWN, LEFT)
+ACTION_DIRECTIONS = (Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT)
+ACTION_STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+def action_index(action):
+    """The integer of an action, also given as a one-hot list for compatibility (None without a 1)."""
+    if isinstance(action, (int, np.integer)):
+        return int(action)
+    for index, value in enumerate(action):
+        if value == 1:
+            return index
+    return None
+
+MAX_BARRIERS = 10
+
+# a game ends in a tie after this many frames
+MAX_FRAMES = 25
+
+# toaster, butter and barriers of a maze, enough to replay a game deterministically
+Layout = namedtuple('Layout', 'toaster, butter, barriers')
+
+# compact, pygame-free copy of everything that changes during an episode
+# the layout (toaster, butter, barriers, distance and mold tables) is not included, so a snapshot
+# can only be restored into the game it was taken from (until the next reset)
+GameSnapshot = namedtuple('GameSnapshot', [
+    'player', 'prev_player', 'direction', 'mold', 'prev_mold',
+    'visited_positions', 'known_heat', 'know_toaster', 'player_wait',
+    'possible_toaster', 'known_barriers', 'possible_butter', 'know_butter',
+    'mold_visited', 'mold_path', 'reward', 'game_over', 'win_condition',
+    'frame_iteration'])
+
+def state_sections(grid_w=11, grid_h=11):
+    """Names, kinds and lengths of the parts of MazeCore.get_state, in order."""
+    cells = (grid_w + 1) // 2 * ((grid_h + 1) // 2)
+    return [
+        ('player', 'pairs', 1), ('direction', 'scalar', 1), ('visited_positions', 'pairs', cells),
+        ('possible_toaster', 'pairs', cells), ('known_heat', 'pairs', 4), ('know_toaster', 'scalar', 1),
+        ('known_barriers', 'pairs', MAX_BARRIERS),
+        ('possible_butter', 'pairs', (grid_w + 1) // 2), ('know_butter', 'scalar', 1),
+        ('mold', 'pairs', 1), ('mold_visited', 'pairs', cells),
+        ('mold_path', 'pairs', (grid_w + 1) // 2 + (grid_h + 1) // 2),
+        ('reward', 'scalar', 1),
+    ]
+
+@lru_cache(maxsize=None)
+def _grid_tables(grid_w, grid_h):
+    """Layout independent tables of a grid, by cell index: positions, neighbours in the mold's N S W E
+    order (-1 off the grid) with the wall between, Manhattan distances and the next cell of the
+    fallback path (y first, then x) that the mold takes towards an unreachable player."""
+    cells = [Point(x, y) for x in range(0, grid_w, 2) for y in range(0, grid_h, 2)]
+    column = (grid_h + 1) // 2
+    coords = np.array(cells)
+    neighbours = np.full((len(cells), 4), -1, dtype=int)
+    walls = np.zeros((len(cells), 4, 2), dtype=int)
+    for cell, pos in enumerate(cells):
+        for k, (dx, dy) in enumerate(((0, -1), (0, 1), (-1, 0), (1, 0))):
+            if 0 <= pos.x + 2 * dx < grid_w and 0 <= pos.y + 2 * dy < grid_h:
+                neighbours[cell, k] = cell + dx * column + dy
+                walls[cell, k] = (pos.x + dx, pos.y + dy)
+
+    dx = coords[None, :, 0] - coords[:, None, 0]
+    dy = coords[None, :, 1] - coords[:, None, 1]
+    manhattan = np.abs(dx) + np.abs(dy)
+    fallback = np.arange(len(cells))[:, None] + np.where(dy != 0, np.sign(dy), np.sign(dx) * column)
+    return cells, coords, neighbours, walls, manhattan, fallback
+
+class MazeCore:
+
+    def __init__(self, grid_w = 11, grid_h = 11, renderer = None, max_frames = MAX_FRAMES, layout = None):
+
+        # the renderer draws the game, without one nothing is drawn
+        # render can be turned off for a while, e.g. while searching over snapshots
+        self.renderer = renderer
+        self.render = renderer is not None
+
+        # a game ends in a tie after max_frames, None plays until someone wins
+        self.max_frames = max_frames
+
+        # initialize grid
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+
+        # a random maze unless a layout is given
+        self.reset(0, layout)
+
+    def reset(self, game_id, layout=None):
+        if self.render:
+            self.renderer.reset(game_id)
+        self._initialize_positions(layout)
+        self._initialize_game_state()
+
+    def get_layout(self):
+        return Layout(self.toaster, self.butter, tuple(self.barriers))
+
+    def _initialize_positions(self, layout=None):
+        
+        # valid positions for everyone
+        self.valid_positions = [Point(x, y) for x in range(0, self.grid_w, 2) for y in range(0, self.grid_h, 2)]
+
+        # valid positions for barriers
+        self.valid_barriers = set(Point(x, y) for x in range(self.grid_w) for y in range(self.grid_h) if (x % 2 != 0) != (y % 2 != 0))
+
+        if layout is not None:
+            # replay a known maze
+            self.toaster = Point(*layout.toaster)
+            self.butter = Point(*layout.butter)
+            self.barriers = [Point(*barrier) for barrier in layout.barriers]
+            self.valid_barriers.difference_update(self.barriers)
+        else:
+            self._generate_layout()
+
+        # shortest path lengths through the barriers, shared by the mold and the observation
+        self.maze_distances = self._calculate_maze_distances()
+
+        # barriers can cut the butter or the toaster off from the player, draw them again
+        while layout is None and not (self.is_reachable(Point(0, 0), self.butter) and self.is_reachable(Point(0, 0), self.toaster)):
+            self.valid_barriers.update(self.barriers)
+            self._generate_barriers()
+            self.maze_distances = self._calculate_maze_distances()
+
+        # where the mold moves and the path it sees, for every mold and player position
+        self._calculate_mold_tables()
+
+        self.toaster_heat = [(self.toaster.x + 2, self.toaster.y), (self.toaster.x - 2, self.toaster.y), (self.toaster.x, self.toaster.y + 2), (self.toaster.x, self.toaster.y - 2)]
+
+        self.frame_iteration = 0
+
+    def _generate_layout(self):
+
+        # toaster position
+        self.toaster = random.choice(self.valid_positions)
+        #self.toaster = Point(2,0)
+
+        # butter position except toaster position
+        self.butter  = random.choice([pos for pos in self.valid_positions if pos != self.toaster])
+        #self.butter = Point(8, 10)
+
+        self._generate_barriers()
+
+    def _generate_barriers(self):
+
+        self.barriers = []
+
+        # add random number of barriers
+        for _ in range(MAX_BARRIERS):
+            barrier = random.choice(list(self.valid_barriers))
+            self.barriers.append(barrier)
+            self.valid_barriers.remove(barrier)
+        #self.barriers.append(Point(1, 0))
+        #self.barriers.append(Point(1, 2))
+        #self.barriers.append(Point(0, 3))
+
+    def _initialize_game_state(self):
+
+        self.reward = 0
+        self.game_over = False
+        self.win_condition = None
+
+        # init player position
+        self.player = Point(0, 0)
+        self.prev_player = None
+
+        # set player direction
+        self.direction = Direction.RIGHT
+
+        # mold position
+        self.mold = Point(10,10)
+        self.prev_mold = None
+
+        # set player visited positions
+        self.visited_positions = set()
+        self.visited_positions.add(self.player)
+
+        # known heat positions
+        self.known_heat = set()
+
+        # know toaster position
+        self.know_toaster = False
+
+        # plaeyr waiting on toaster
+        self.player_wait = False
+
+        # possible positions of the toaster
+        self.possible_toaster = self.valid_positions.copy()
+
+        # set player known barriers
+        self.known_barriers = set()
+        self._reveal_barriers() # revela as barreiras que estão na posição inicial do player
+
+        # possible possitions of the butter
+        self.distances = self._calculate_distances()
+        self.possible_butter = self._init_possible_butter()
+        self.know_butter = False
+
+        # visited mold positions
+        self.mold_visited = set()
+        self.mold_visited.add(self.mold)
+
+        # mold path, x and y of its first steps padded with -1 as they appear in the observation
+        self.mold_path = self.no_mold_path
+
+    def snapshot(self):
+
+        # sets and lists are frozen so the snapshot can be shared between many restores
+        return GameSnapshot(
+            self.player, self.prev_player, self.direction, self.mold, self.prev_mold,
+            frozenset(self.visited_positions), frozenset(self.known_heat), self.know_toaster, self.player_wait,
+            tuple(self.possible_toaster), frozenset(self.known_barriers), tuple(self.possible_butter), self.know_butter,
+            frozenset(self.mold_visited), tuple(self.mold_path.tolist()), self.reward, self.game_over, self.win_condition,
+            self.frame_iteration)
+
+    def restore(self, snapshot):
+
+        self.player = snapshot.player
+        self.prev_player = snapshot.prev_player
+        self.direction = snapshot.direction
+        self.mold = snapshot.mold
+        self.prev_mold = snapshot.prev_mold
+        self.visited_positions = set(snapshot.visited_positions)
+        self.known_heat = set(snapshot.known_heat)
+        self.know_toaster = snapshot.know_toaster
+        self.player_wait = snapshot.player_wait
+        self.possible_toaster = list(snapshot.possible_toaster)
+        self.known_barriers = set(snapshot.known_barriers)
+        self.possible_butter = list(snapshot.possible_butter)
+        self.know_butter = snapshot.know_butter
+        self.mold_visited = set(snapshot.mold_visited)
+        self.mold_path = np.array(snapshot.mold_path)
+        self.reward = snapshot.reward
+        self.game_over = snapshot.game_over
+        self.win_condition = snapshot.win_condition
+        self.frame_iteration = snapshot.frame_iteration
+
+    def get_state(self):
+
+        # the positions of every part are listed in (x, y) order, so the observation only depends
+        # on the state of the game and can be rebuilt from a compact record, see records.py
+
+        # convert visited positions to list of positions
+        # there's self.grid_w * self.grid_h / 4 possible positions
+        visited_positions = sorted(self.visited_positions)
+        while len(visited_positions) < (self.grid_w + 1)/2 * (self.grid_h + 1)/2:
+            visited_positions.append((-1, -1))
+        # remove tuples
+        visited_positions = [pos for sublist in visited_positions for pos in sublist]
+
+        # convert possible toaster to list of positions
+        # there's self.grid_w * self.grid_h / 4 possible positions
+        possible_toaster = sorted(self.possible_toaster)
+        while len(possible_toaster) < (self.grid_w + 1)/2 * (self.grid_h + 1)/2:
+            possible_toaster.append((-1, -1))
+        # remove tuples
+        possible_toaster = [pos for sublist in possible_toaster for pos in sublist]
+
+        #convert 4 known heat to list of positions
+        # there's 4 possible heat positions
+        heat_positions = sorted(self.known_heat)
+        while len(heat_positions) < 4:
+            heat_positions.append((-1, -1))
+        # remove tuples
+        heat_positions = [pos for sublist in heat_positions for pos in sublist]
+
+        # convert known barriers to list of positions
+        # there's MAX_BARRIERS possible positions
+        known_barriers = sorted(self.known_barriers)
+        while len(known_barriers) < MAX_BARRIERS:
+            known_barriers.append((-1, -1))
+        # remove tuples
+        known_barriers = [pos for sublist in known_barriers for pos in sublist]
+
+        # convert possible butter to list of positions
+        # there's maximum self.grid + 1 /2 possible positions
+        possible_butter = sorted(self.possible_butter)
+        while len(possible_butter) < (self.grid_w + 1)/2:
+            possible_butter.append((-1, -1))
+        # remove tuples
+        possible_butter = [pos for sublist in possible_butter for pos in sublist]
+
+        # convert mold visited to list of positions
+        # there's self.grid_w * self.grid_h / 4 possible positions
+        mold_visited = sorted(self.mold_visited)
+        while len(mold_visited) < (self.grid_w + 1)/2 * (self.grid_h + 1)/2:
+            mold_visited.append((-1, -1))
+        # remove tuples
+        mold_visited = [pos for sublist in mold_visited for pos in sublist]
+
+        arr = np.array([
+            # player info
+            self.player.x,
+            self.player.y,                  
+            self.direction.value,               # player direction
+            *visited_positions,                  # visited positions
+
+            # toaster info
+            *possible_toaster,      # possible toaster positions
+            *heat_positions,        # known heat positions
+            self.know_toaster,      # know toaster position
+
+            # barriers info
+            *known_barriers,    # known barriers
+
+            # butter info
+            *possible_butter,   # possible butter positions
+            self.know_butter,       # know butter position
+            
+            # mold info
+            self.mold.x,              # mold position
+            self.mold.y,
+            *mold_visited,      # visited mold positions
+            *self.mold_path,    # mold path, already padded
+
+            # reward info
+            self.reward             # reward
+            ], dtype=int)
+        
+        #print(arr)
+
+        self._update_ui()
+        return arr
+
+
+    def play_step(self, action):
+
+        # increase frame iteration
+        self.frame_iteration += 1
+
+        # update state
+        self._update_state()
+
+        # update ui and clock
+        # 1. window events are handled by the renderer while it draws
+        self._update_ui()
+
+        # 2. move
+        self._move(action)
+
+        self._update_state()
+
+        # 3. check if game over
+        self._is_game_over()
+        if self.game_over:
+            return self.reward, self.game_over, self.win_condition
+        
+        if self.max_frames is not None and self.frame_iteration > self.max_frames:
+            self.game_over = True
+            self.win_condition = 5
+            self.reward = -100
+            return self.reward, self.game_over, self.win_condition
+
+        # 4. update ui and clock
+        self._update_ui()
+
+        # 5. return game over and score
+        return self.reward, self.game_over, self.win_condition
+    
+    def is_action_impossible(self):
+
+        # check if there are barriers in all directions and can is valid move
+        return not any(self.is_action_valid(action) for action in ACTIONS)
+
+    def is_action_valid(self, action):
+        action = action_index(action)
+        if action is None:
+            return False
+        dx, dy = ACTION_STEPS[action]
+        # the player is always on a cell, so the next cell is valid when it is on the grid
+        return (Point(self.player.x + dx, self.player.y + dy) not in self.known_barriers
+                and 0 <= self.player.x + 2 * dx < self.grid_w and 0 <= self.player.y + 2 * dy < self.grid_h)
+    
+    def _calculate_distances(self):
+        distances = np.zeros((self.grid_w, self.grid_h))
+        for x in range(self.grid_w):
+            for y in range(self.grid_h):
+                if x % 2 == 0 and y % 2 == 0:
+                    distances[x, y] = int(self._get_distance(Point(x, y), self.butter)/2)
+                else:
+                    distances[x, y] = -1
+        return distances
+    
+    def _reveal_barriers(self):
+        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        for direction in directions:
+            if Point(self.player.x + direction[0], self.player.y + direction[1]) in self.barriers and Point(self.player.x + direction[0], self.player.y + direction[1]) not in self.known_barriers:
+                self.known_barriers.add(Point(self.player.x + direction[0], self.player.y + direction[1]))
+    
+    def _move(self, action):
+
+        # an action that is not a move keeps the direction
+        action = action_index(action)
+        if action is not None:
+            self.direction = ACTION_DIRECTIONS[action]
+
+        if (self.player_wait == False):
+            if self.direction == Direction.UP:
+                self.prev_player = self.player
+                self.player = Point(self.player.x, self.player.y - 2)
+            elif self.direction == Direction.RIGHT:
+                self.prev_player = self.player
+                self.player = Point(self.player.x + 2, self.player.y)
+            elif self.direction == Direction.LEFT:
+                self.prev_player = self.player
+                self.player = Point(self.player.x - 2, self.player.y)
+            elif self.direction == Direction.DOWN:
+                self.prev_player = self.player
+                self.player = Point(self.player.x, self.player.y + 2)
+
+            # add player to visited positions
+            if self.player not in self.visited_positions:
+                self.visited_positions.add(self.player)
+                # increase reward for discovering new position
+                self.reward += 2
+            else:
+                self.reward -= 1
+            
+
+        # reveal barriers on player position
+        self._reveal_barriers()
+
+        self._update_ui()
+
+        self._update_reward_player()
+
+        # check game over
+        self._is_game_over()
+
+        # if game hasnt finished move mold
+        if not self.game_over:
+
+            # move mold
+            self._move_mold()
+
+            self._update_reward_mold()
+
+            # check if player is in toaster
+            if (self.player == self.toaster and self.player_wait == True):
+                self.player_wait = False
+            elif (self.player == self.toaster and self.player_wait == False):
+                self.player_wait = True
+
+    def _move_mold(self):
+
+        # the next cell only depends on the mold and player cells, see _calculate_mold_tables
+        mold_cell = self._get_cell(self.mold)
+        next_cell = self.mold_next[mold_cell, self._get_cell(self.player)]
+
+        # the mold stays when barriers close every way out
+        if next_cell != mold_cell:
+            self.prev_mold = self.mold
+            self.mold = self.cells[next_cell]
+
+        # add mold to visited positions
+        if self.mold not in self.mold_visited:
+            self.mold_visited.add(self.mold)
+            # increase reward for discovering new position
+            self.reward += 2
+        else:
+            self.reward -= 1
+
+        self.mold_path = self.mold_path_rows[self._get_cell(self.mold), self._get_cell(self.player)]
+
+    def _get_moves(self):
+        # neighbour cells of every cell that are not behind a barrier, -1 where there is none
+        _, _, neighbours, walls, _, _ = _grid_tables(self.grid_w, self.grid_h)
+        blocked = np.zeros((self.grid_w, self.grid_h), dtype=bool)
+        for barrier in self.barriers:
+            blocked[barrier] = True
+        return np.where((neighbours >= 0) & ~blocked[walls[..., 0], walls[..., 1]], neighbours, -1)
+
+    def _calculate_mold_tables(self):
+
+        # mold has priority of moving of N S W E
+        # it takes the move that is shortest to the player through the maze,
+        # if the player can't be reached the mold just gets closer
+        self.cells, coords, _, _, manhattan, fallback = _grid_tables(self.grid_w, self.grid_h)
+        n = len(self.cells)
+        moves = self._get_moves()
+        distances = np.where(self.maze_distances == -1, self.grid_w * self.grid_h + manhattan, self.maze_distances)
+        candidates = np.where(moves[:, :, None] >= 0, distances[moves], np.iinfo(distances.dtype).max)
+
+        # argmin keeps the first of equally short moves, mold_next[mold, player] is the next mold cell
+        best = moves[np.arange(n)[:, None], candidates.argmin(axis=1)]
+        self.mold_next = np.where(best >= 0, best, np.arange(n)[:, None])
+
+        # mold_ties[mold, player]: the move was picked by the priority among equally short moves
+        shortest = candidates.min(axis=1, keepdims=True)
+        self.mold_ties = ((candidates == shortest) & (moves[:, :, None] >= 0)).sum(axis=1) > 1
+
+        # mold_path_ties[mold, player]: the path depends on a priority, a tie anywhere along the
+        # shortest path, or both orders of the fallback path when the player can't be reached
+        # pointer doubling: after k rounds ties covers the first 2**k steps and jump is the cell after them
+        target = np.arange(n)
+        jump = self.mold_next.copy()
+        jump[target, target] = target
+        ties = self.mold_ties & (np.arange(n)[:, None] != target)
+        for _ in range(int(self.maze_distances.max()).bit_length()):
+            ties = ties | ties[jump, target]
+            jump = jump[jump, target]
+        dx, dy = (coords[None, :, k] != coords[:, None, k] for k in (0, 1))
+        self.mold_path_ties = np.where(self.maze_distances >= 0, ties, dx & dy)
+
+        # the path follows the shortest path through the maze, in the N S W E priority on ties,
+        # or goes along y first, then x, when the player can't be reached; only the steps the
+        # observation holds are kept
+        length = (self.grid_w + 1) // 2 + (self.grid_h + 1) // 2
+        # cell n is padding, every step from the player or from padding leads to it
+        steps = np.full((2, n + 1, n), n)
+        steps[0, :n], steps[1, :n] = fallback, self.mold_next
+        steps[:, np.arange(n), np.arange(n)] = n
+        steps = steps.ravel()
+        offset = np.arange(n) + (self.maze_distances >= 0) * (n + 1) * n    # flat index of (., target) in its table
+        path = np.empty((length + 1, n, n), dtype=int)
+        path[0] = np.arange(n)[:, None]
+        for step in range(length):
+            path[step + 1] = steps[path[step] * n + offset]
+        self.mold_path_rows = np.vstack([coords, (-1, -1)])[path[1:].transpose(1, 2, 0)].reshape(n, n, 2 * length)
+        self.no_mold_path = np.full(2 * length, -1)
+    
+    def _update_state(self):
+        self._remove_possible_toaster()
+        self._remove_possible_butter()
+
+    def _update_reward_player(self):
+        
+        if self.prev_player != None:
+            # if player gets closer to toaster reward is positive
+            if self._get_distance(self.player, self.toaster) < self._get_distance(self.prev_player, self.toaster):
+                self.reward += 1
+            # if player gets farther from toaster reward is negative
+            elif self._get_distance(self.player, self.toaster) > self._get_distance(self.prev_player, self.toaster):
+                self.reward -= 1
+
+            # if player gets farther from mold reward is positive
+            if self._get_distance(self.player, self.mold) > self._get_distance(self.prev_player, self.mold):
+                self.reward += 2
+            # if player gets closer to mold reward is negative
+            elif self._get_distance(self.player, self.mold) < self._get_distance(self.prev_player, self.mold):
+                self.reward -= 2
+
+            # if player gets closer to butter reward is positive
+            if self._get_distance(self.player, self.butter) < self._get_distance(self.prev_player, self.butter):
+                self.reward += 3
+            # if player gets farther from butter reward is negative
+            elif self._get_distance(self.player, self.butter) > self._get_distance(self.prev_player, self.butter):
+                self.reward -= 3
+
+    def _update_reward_mold(self):
+
+        if self.prev_mold != None:
+            # if mold gets closer to toaster reward is positive
+            if self._get_distance(self.mold, self.toaster) < self._get_distance(self.prev_mold, self.toaster):
+                self.reward += 2
+            # if mold gets farther from toaster reward is negative
+            elif self._get_distance(self.mold, self.toaster) > self._get_distance(self.prev_mold, self.toaster):
+                self.reward -= 2
+
+            # if mold gets closer to player reward is negative
+            if self._get_distance(self.mold, self.player) < self._get_distance(self.prev_mold, self.player):
+                self.reward -= 2
+            # if mold gets farther from player reward is positive
+            elif self._get_distance(self.mold, self.player) > self._get_distance(self.prev_mold, self.player):
+                self.reward += 2
+
+            # if mold gets closer to butter reward is negative
+            if self._get_distance(self.mold, self.butter) < self._get_distance(self.prev_mold, self.butter):
+                self.reward -= 2
+            # if mold gets farther from butter reward is positive
+            elif self._get_distance(self.mold, self.butter) > self._get_distance(self.prev_mold, self.butter):
+                self.reward += 2
+            
+    def _remove_possible_toaster(self):
+
+        # if player is in toaster heat we can remove some positions
+        if self.player in self.toaster_heat:
+            self.known_heat.add(self.player)
+            
+            # increase reward for discovering heat
+            self.reward += 2
+
+        # remove current player position from possible toaster positions
+        if self.player in self.possible_toaster and self.player != self.toaster:
+            self.possible_toaster.remove(self.player)
+
+        # remove mold position from possible toaster positions
+        if self.mold in self.possible_toaster and self.mold != self.toaster:
+            self.possible_toaster.remove(self.mold)
+
+        if self.player == self.toaster:
+            self.know_toaster = True
+            self.possible_toaster = [self.toaster]
+
+            # increase reward for discovering toaster
+            self.reward += 15
+
+        # if there's more than one possible toaster position we can remove some positions
+        if len(self.possible_toaster) > 1:
+            copy_possible_toaster = self.possible_toaster.copy()
+            
+            # remove positions that are not 2 distance from the heat
+            for (x, y) in copy_possible_toaster:
+                for heat in self.known_heat:
+                    if (self._get_distance(Point(heat[0], heat[1]), Point(x, y)) != 2 and (x, y) in self.possible_toaster):
+                        self.possible_toaster.remove(Point(x, y))
+
+        # if there's only one possible toaster position we can know the toaster position
+        if (len(self.possible_toaster) == 1) and self.know_toaster == False:
+            self.know_toaster = True
+            # increase reward for discovering toaster
+            self.reward += 15
+
+    def _init_possible_butter(self):
+        possible_butter = []
+
+        for (x, y) in self.valid_positions:
+            if (x + y) == 2*self.distances[0][0]:
+                possible_butter.append(Point(x, y))
+
+        return possible_butter
+    
+    def _remove_possible_butter(self):
+        possible_butter = self.possible_butter.copy()
+        for (x, y) in possible_butter:
+            if (self._get_distance(Point(x, y), self.player) != 2 * self.distances[self.player.x, self.player.y]) or (x,y) in self.mold_visited:
+                self.possible_butter.remove(Point(x, y))
+
+        if len(self.possible_butter) == 1 and self.know_butter == False:
+            self.know_butter = True
+            # increase reward for discovering butter
+            self.reward += 10
+                
+    def _get_distance(self, p1, p2):
+        return abs(p1.x - p2.x) + abs(p1.y - p2.y)
+
+    def _get_cell(self, pos):
+        # index of a valid position in the maze distance field
+        return (pos.x // 2) * ((self.grid_h + 1) // 2) + pos.y // 2
+
+    def _calculate_maze_distances(self):
+
+        # breadth first search from every valid position at once over the barrier graph, -1 when unreachable
+        # a cell joins the frontier of a source when one of its neighbours is in it, the extra
+        # column n stands for missing neighbours and stays empty
+        moves = self._get_moves()
+        n = len(moves)
+        distances = np.full((n, n), -1, dtype=int)
+        frontier = np.zeros((n, n + 1), dtype=bool)
+        frontier[np.arange(n), np.arange(n)] = True
+        reached = frontier[:, :n].copy()
+        distance = 0
+        while True:
+            distances[frontier[:, :n]] = distance
+            frontier[:, :n] = frontier[:, moves].any(axis=2) & ~reached
+            if not frontier.any():
+                return distances
+            reached |= frontier[:, :n]
+            distance += 1
+
+    def _get_maze_distance(self, p1, p2):
+        return self.maze_distances[self._get_cell(p1), self._get_cell(p2)]
+
+    def is_reachable(self, p1, p2):
+        return self._get_maze_distance(p1, p2) != -1
+
+    def is_mold_move_tie(self, mold, player):
+        """The mold's next move from mold towards player is one of several equally short moves."""
+        return bool(self.mold_ties[self._get_cell(mold), self._get_cell(player)])
+
+    def is_mold_path_tie(self, mold, player):
+        """The mold path from mold to player depends on how ties between moves are broken."""
+        return bool(self.mold_path_ties[self._get_cell(mold), self._get_cell(player)])
+
+    def _is_game_over(self):
+
+        # if player hits butter player wins
+        if self.player == self.butter:
+            self._show_message("You Win: player reached butter!")
+            self.reward += 100
+            self.game_over = True
+            self.win_condition = WinCondition.PLAYER_HIT_BUTTER.value
+        # if mold hits toaster player wins
+        elif self.mold == self.toaster:
+            self._show_message("You Win: mold reached toaster!")
+            self.reward += 150
+            self.game_over = True
+            self.win_condition = WinCondition.MOLD_HIT_TOASTER.value
+        # if player hits mold player loses
+        elif self.player == self.mold:
+            self._show_message("You Lose: player reached mold!")
+            self.reward -= 100
+            self.game_over = True
+            self.win_condition = WinCondition.MOLD_HIT_PLAYER.value
+        # if mold hits butter player loses
+        elif self.mold == self.butter:
+            self._show_message("You Lose: mold reached butter!")
+            self.reward -= 100
+            self.game_over = True
+            self.win_condition = WinCondition.MOLD_HIT_BUTTER.value
+        return False
+
+    def _show_message(self, message):
+
+        if not self.render:
+            return
+        self.renderer.show_message(message)
+
+    def _update_ui(self):
+
+        if not self.render:
+            return
+        self.renderer.draw(self)
@@ -0,0 +1,155 @@
+import sys
+import time
+import tracemalloc
+import warnings
+
+
+def get_rss():
+    """Resident memory of this process in bytes."""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # peak instead of current resident memory where there's no /proc
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _list_nbytes(values):
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+
+
+def _count_artists():
+    # only when the plots were actually opened
+    plt = sys.modules.get('matplotlib.pyplot')
+    if plt is None:
+        return 0, 0
+    figures = [plt.figure(number) for number in plt.get_fignums()]
+    return len(figures), sum(len(figure.findobj()) for figure in figures)
+
+
+def _mb(n_bytes):
+    return n_bytes / 2**20
+
+
+class MemoryMonitor:
+    """Reports where the memory of a training run goes every `every` games.
+
+    Each report has the resident memory, the replay buffer bytes, the size of any lists
+    passed in (like the plot history), the matplotlib figures and artists, and the top
+    allocation sites from tracemalloc. When max_rss is set, it is checked after every game
+    and the replay buffer is shrunk (on_limit='evict') or a RuntimeWarning is raised (on_limit='warn')
+    before the node runs out of memory. The buffer never shrinks below one batch, past that it
+    warns too. A warning is given once each time the limit is crossed.
+    """
+
+    def __init__(self, every=100, top_sites=10, max_rss=None, on_limit='evict', evict_fraction=0.25, verbose=True):
+        if on_limit not in ('evict', 'warn'):
+            raise ValueError(f"on_limit must be 'evict' or 'warn', got '{on_limit}'")
+        self.every = every
+        self.top_sites = top_sites
+        self.max_rss = max_rss
+        self.on_limit = on_limit
+        self.evict_fraction = evict_fraction
+        self.verbose = verbose
+        self.reports = []
+        self.evictions = 0
+        self.warned = False     # a warning was given since the limit was last crossed
+
+        # tracemalloc slows every allocation down, so it is only on when sites are reported
+        if top_sites and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def check(self, agent, n_games, lists=None):
+        """Called after every game, returns the report when one is due."""
+        if self.max_rss is not None:
+            self._enforce_limit(agent)
+        if n_games % self.every != 0:
+            return None
+
+        report = self.report(agent, lists)
+        report['games'] = n_games
+        self.reports.append(report)
+        if self.verbose:
+            self.print_report(report)
+        return report
+
+    def report(self, agent, lists=None):
+        figures, artists = _count_artists()
+        report = {
+            'time': time.time(),
+            'rss': get_rss(),
+            'replay_bytes': agent.memory.nbytes,
+            'replay_transitions': len(agent.memory),
+            'replay_capacity': agent.memory.capacity,
+            'lists': {name: (len(values), _list_nbytes(values)) for name, values in (lists or {}).items()},
+            'figures': figures,
+            'artists': artists,
+            'sites': [],
+        }
+        if tracemalloc.is_tracing():
+            report['traced'], report['traced_peak'] = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics('lineno')
+            report['sites'] = [(str(stat.traceback[0]), stat.size, stat.count) for stat in statistics[:self.top_sites]]
+        return report
+
+    def print_report(self, report):
+        print(f"Memory after {report['games']} games: rss {_mb(report['rss']):.1f} MB, "
+              f"replay {_mb(report['replay_bytes']):.1f} MB ({report['replay_transitions']}/{report['replay_capacity']} transitions), "
+              f"figures {report['figures']} ({report['artists']} artists)")
+        for name, (length, n_bytes) in report['lists'].items():
+            print(f"  {name}: {length} items, {_mb(n_bytes):.2f} MB")
+        if 'traced' in report:
+            print(f"  traced {_mb(report['traced']):.1f} MB, peak {_mb(report['traced_peak']):.1f} MB")
+        for site, size, count in report['sites']:
+            print(f"  {_mb(size):8.2f} MB {count:>8} blocks  {site}")
+
+    def _enforce_limit(self, agent):
+        rss = get_rss()
+        if rss <= self.max_rss:
+            self.warned = False
+            return
+
+        # the buffer is preallocated, so only a smaller buffer gives memory back,
+        # but never below one batch; past that the rest of the process is the problem
+        capacity = max(agent.batch_size, int(agent.memory.capacity * (1 - self.evict_fraction)))
+        message = f"rss {_mb(rss):.1f} MB is over the limit of {_mb(self.max_rss):.1f} MB"
+        if self.on_limit == 'warn' or capacity >= agent.memory.capacity:
+            # once each time the limit is crossed, not after every game over it;
+            # ResourceWarning is ignored by the default filters, RuntimeWarning is shown
+            if not self.warned:
+                warnings.warn(message, RuntimeWarning)
+                self.warned = True
+            return
+
+        agent.memory.resize(capacity)
+        self.evictions += 1
+        if self.verbose:
+            print(f"{message}, replay memory shrunk to {capacity} transitions")
+
+    def close(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+    from agent import Agent, train
+
+    parser = argparse.ArgumentParser(description='Headless training run with periodic memory reports')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--every', type=int, default=100, help='games between reports')
+    parser.add_argument('--top-sites', type=int, default=10, help='allocation sites per report, 0 turns tracemalloc off')
+    parser.add_argument('--max-rss-mb', type=float, default=None, help='memory limit')
+    parser.add_argument('--on-limit', choices=('evict', 'warn'), default='evict')
+    args = parser.parse_args()
+
+    monitor = MemoryMonitor(args.every, args.top_sites, args.max_rss_mb and args.max_rss_mb * 2**20, args.on_limit)
+    train(agent=Agent(verbose=False), render=False, plot=False, save_model=False, verbose=False,
+          max_games=args.games, memory_monitor=monitor)
+    monitor.close()
@@ -3,6 +3,7 @@ import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import os
+import warnings
 import numpy as np
 
 class Linear_QNet(nn.Module):
@@ -32,23 +33,43 @@ class Linear_QNet(nn.Module):
         file_name = os.path.join(model_folder_path, file_name)
         torch.save(self.state_dict(), file_name)
 
+def _bucket(n):
+    # batches are padded to a power of two so the compiled step only sees a few shapes
+    return 1 << (n - 1).bit_length()
+
+def _fused_adam(params, lr):
+    # one kernel for every parameter instead of a Python loop over them, where this torch has it
+    try:
+        return optim.Adam(params, lr=lr, fused=True)
+    except (RuntimeError, TypeError, ValueError):
+        return optim.Adam(params, lr=lr, foreach=True)
+
 class QTrainer:
 
-    def __init__(self, model, lr, gamma):
+    def __init__(self, model, lr, gamma, compiled=False):
         self.model = model
         self.lr = lr
         self.gamma = gamma
-        self.optimizer = optim.Adam(model.parameters(), lr=self.lr)
+        self.optimizer = _fused_adam(model.parameters(), self.lr) if compiled else optim.Adam(model.parameters(), lr=self.lr)
         self.criteria = nn.MSELoss()
+        self.compiled = compiled
+        if compiled:
+            self.inputs = {}                # bucket size -> preallocated input tensors
+            self.loss_fn = self._masked_loss
+            try:
+                self.loss_fn = torch.compile(self._masked_loss, dynamic=False)
+            except Exception as error:
+                warnings.warn(f'torch.compile is not available, the fixed-shape step runs eagerly: {error}')
 
-    def train_step(self, state, action, reward, next_state, is_done):
+    def to_tensors(self, state, action, reward, next_state, is_done):
         # convert to tensors
         state = np.array(state, dtype=np.float32)
         state = torch.tensor(state, dtype=torch.float)
         next_state = np.array(next_state, dtype=np.float32)
         next_state = torch.tensor(next_state, dtype=torch.float)
-        action = torch.tensor(action, dtype=torch.long)
-        reward = torch.tensor(reward, dtype=torch.float)
+        action = torch.tensor(np.array(action), dtype=torch.long)
+        reward = torch.tensor(np.array(reward), dtype=torch.float)
+        is_done = torch.tensor(np.array(is_done), dtype=torch.bool)
 
         if len(state.shape) == 1:
             # add a batch dimension
@@ -56,22 +77,79 @@ class QTrainer:
             next_state = torch.unsqueeze(next_state, 0)
             action = torch.unsqueeze(action, 0)
             reward = torch.unsqueeze(reward, 0)
-            is_done = (is_done, )
+            is_done = torch.unsqueeze(is_done, 0)
+
+        # actions are indexes, one-hot rows are still accepted
+        if action.dim() == 2:
+            action = torch.argmax(action, dim=1)
+
+        return state, action, reward, next_state, is_done
+
+    def compute_loss(self, state, action, reward, next_state, is_done):
 
         # predicted Q values
         pred = self.model(state)
 
-        target = pred.clone()
-        for idx in range(len(is_done)):
-            Q_new = reward[idx]
-            if not is_done[idx]:
-                Q_new = reward[idx] + self.gamma * torch.max(self.model(next_state[idx]))
+        # Q_new = reward + gamma * max(next predicted Q value), only reward when the game is done
+        with torch.no_grad():
+            next_q = torch.max(self.model(next_state), dim=1).values
+        q_new = reward + self.gamma * next_q * (~is_done)
 
-            target[idx][torch.argmax(action).item()] = Q_new
+        # the target only differs from the prediction on the action that was taken
+        target = pred.detach().clone()
+        target[torch.arange(len(target)), action] = q_new
+
+        return self.criteria(target, pred)
+
+    def _masked_loss(self, state, action, reward, next_state, is_done, mask):
+        # same loss and gradient as compute_loss, padded rows have a zero mask
+        pred = self.model(state)
+        with torch.no_grad():
+            next_q = torch.max(self.model(next_state), dim=1).values
+            q_new = reward + self.gamma * next_q * (~is_done)
+        pred_action = pred.gather(1, action.unsqueeze(1)).squeeze(1)
+        return ((q_new - pred_action) ** 2 * mask).sum() / (mask.sum() * pred.shape[1])
+
+    def _fill_inputs(self, state, action, reward, next_state, is_done):
+        # copies the batch into the preallocated tensors of its bucket
+        state = np.asarray(state, dtype=np.float32)
+        if state.ndim == 1:
+            state, next_state = state[None], np.asarray(next_state, dtype=np.float32)[None]
+            action, reward, is_done = [action], [reward], [is_done]
+        action = np.asarray(action)
+        if action.ndim == 2:
+            action = np.argmax(action, axis=1)
+        n = len(state)
+        size = _bucket(n)
+        if size not in self.inputs:
+            self.inputs[size] = (torch.zeros(size, state.shape[1]), torch.zeros(size, dtype=torch.long), torch.zeros(size),
+                                 torch.zeros(size, state.shape[1]), torch.ones(size, dtype=torch.bool), torch.zeros(size))
+        inputs = self.inputs[size]
+        inputs[0][:n] = torch.from_numpy(state)
+        inputs[1][:n] = torch.from_numpy(action.astype(np.int64))
+        inputs[2][:n] = torch.from_numpy(np.asarray(reward, dtype=np.float32))
+        inputs[3][:n] = torch.from_numpy(np.asarray(next_state, dtype=np.float32))
+        inputs[4][:n] = torch.from_numpy(np.asarray(is_done, dtype=bool))
+        inputs[5].zero_()[:n] = 1
+        return inputs
+
+    def train_step(self, state, action, reward, next_state, is_done):
+        if self.compiled:
+            inputs = self._fill_inputs(state, action, reward, next_state, is_done)
+            try:
+                loss = self.loss_fn(*inputs)
+            except Exception as error:
+                # compilation only happens on the first call of each shape
+                if self.loss_fn == self._masked_loss:
+                    raise
+                warnings.warn(f'torch.compile failed, the fixed-shape step runs eagerly: {error}')
+                self.loss_fn = self._masked_loss
+                loss = self.loss_fn(*inputs)
+        else:
+            loss = self.compute_loss(*self.to_tensors(state, action, reward, next_state, is_done))
 
         # calculate loss
         self.optimizer.zero_grad()
-        loss = self.criteria(target, pred)
         loss.backward()
 
         # update model
@@ -0,0 +1,133 @@
+import socket
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from model import Linear_QNet, QTrainer
+
+# commands broadcast by rank 0 to the other learner processes
+STOP = 0
+TRAIN = 1
+CHECK = 2
+
+
+def _get_free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _train_shard(trainer, batch, rank, world_size):
+
+    # every rank always has gradients, even when its shard is empty
+    for param in trainer.model.parameters():
+        if param.grad is None:
+            param.grad = torch.zeros_like(param)
+    trainer.optimizer.zero_grad(set_to_none=False)
+
+    # the loss of each shard is weighted by its size, so the summed gradients equal the full batch gradient
+    shard = [tensor.tensor_split(world_size)[rank] for tensor in batch]
+    if len(shard[0]) > 0:
+        loss = trainer.compute_loss(*shard) * (len(shard[0]) / len(batch[0]))
+        loss.backward()
+
+    # one all-reduce for all the gradients
+    params = list(trainer.model.parameters())
+    grads = torch.cat([param.grad.view(-1) for param in params])
+    dist.all_reduce(grads, op=dist.ReduceOp.SUM)
+    offset = 0
+    for param in params:
+        param.grad.copy_(grads[offset:offset + param.numel()].view_as(param))
+        offset += param.numel()
+
+    trainer.optimizer.step()
+
+
+def _checksum(model):
+    return torch.cat([param.detach().view(-1) for param in model.parameters()]).double().sum().view(1)
+
+
+def _receive_batch(state_size):
+    header = torch.zeros(1, dtype=torch.long)
+    dist.broadcast(header, 0)
+    size = header.item()
+    batch = [torch.zeros(size, state_size), torch.zeros(size, dtype=torch.long),
+             torch.zeros(size), torch.zeros(size, state_size), torch.zeros(size, dtype=torch.uint8)]
+    for tensor in batch:
+        dist.broadcast(tensor, 0)
+    batch[4] = batch[4].bool()
+    return batch
+
+
+def _worker(rank, world_size, init_method, sizes, lr, gamma, threads):
+    torch.set_num_threads(threads)
+    dist.init_process_group('gloo', init_method=init_method, rank=rank, world_size=world_size)
+
+    model = Linear_QNet(*sizes)
+    trainer = QTrainer(model, lr=lr, gamma=gamma)
+    for param in model.parameters():
+        dist.broadcast(param.data, 0)
+
+    while True:
+        command = torch.zeros(1, dtype=torch.long)
+        dist.broadcast(command, 0)
+        if command.item() == STOP:
+            break
+        if command.item() == TRAIN:
+            _train_shard(trainer, _receive_batch(sizes[0]), rank, world_size)
+        elif command.item() == CHECK:
+            checksum = _checksum(model)
+            dist.all_reduce(checksum.clone(), op=dist.ReduceOp.MAX)
+            dist.all_reduce(checksum.clone(), op=dist.ReduceOp.MIN)
+
+    dist.destroy_process_group()
+
+
+class DataParallelLearner:
+    """Shards every train step across world_size CPU processes and all-reduces the gradients over gloo.
+
+    The calling process is rank 0 and keeps training its own trainer, the other ranks hold copies
+    of the model that stay identical because they apply the same reduced gradients.
+    """
+
+    def __init__(self, trainer, world_size, threads=1):
+        self.trainer = trainer
+        self.world_size = world_size
+
+        model = trainer.model
+        sizes = (model.linear1.in_features, model.linear1.out_features, model.linear3.out_features)
+        init_method = f'tcp://127.0.0.1:{_get_free_port()}'
+
+        context = mp.get_context('spawn')
+        self.workers = [context.Process(target=_worker, args=(rank, world_size, init_method, sizes, trainer.lr, trainer.gamma, threads), daemon=True)
+                        for rank in range(1, world_size)]
+        for worker in self.workers:
+            worker.start()
+
+        dist.init_process_group('gloo', init_method=init_method, rank=0, world_size=world_size)
+        for param in model.parameters():
+            dist.broadcast(param.data, 0)
+
+    def train_step(self, state, action, reward, next_state, is_done):
+        batch = self.trainer.to_tensors(state, action, reward, next_state, is_done)
+
+        dist.broadcast(torch.tensor([TRAIN]), 0)
+        dist.broadcast(torch.tensor([len(batch[0])]), 0)
+        for tensor in batch[:4]:
+            dist.broadcast(tensor.contiguous(), 0)
+        dist.broadcast(batch[4].to(torch.uint8), 0)
+
+        _train_shard(self.trainer, batch, 0, self.world_size)
+
+    def weights_in_sync(self):
+        dist.broadcast(torch.tensor([CHECK]), 0)
+        checksum = _checksum(self.trainer.model)
+        high, low = checksum.clone(), checksum.clone()
+        dist.all_reduce(high, op=dist.ReduceOp.MAX)
+        dist.all_reduce(low, op=dist.ReduceOp.MIN)
+        return high.item() == low.item()
+
+    def close(self):
+        dist.broadcast(torch.tensor([STOP]), 0)
+        dist.destroy_process_group()
+        for worker in self.workers:
+            worker.join()
@@ -0,0 +1,173 @@
+import argparse
+import json
+import multiprocessing as mp
+import random
+import time
+import numpy as np
+from agent import Agent, train, seed_worker, LR, GAMMA, EPSILON_GAMES
+
+# hyperparameters that change during a run, with the range each one is kept in
+MUTABLE = {
+    'lr': (1e-5, 1e-1),
+    'gamma': (0.5, 0.999),
+    'epsilon_games': (0, 1000),
+}
+
+
+def get_hyperparameters(agent):
+    return {'lr': agent.trainer.optimizer.param_groups[0]['lr'], 'gamma': agent.gamma, 'epsilon_games': agent.epsilon_games}
+
+
+def set_hyperparameters(agent, hyperparameters):
+    for group in agent.trainer.optimizer.param_groups:
+        group['lr'] = hyperparameters['lr']
+    agent.gamma = agent.trainer.gamma = hyperparameters['gamma']
+    agent.epsilon_games = int(hyperparameters['epsilon_games'])
+
+
+def perturb(hyperparameters, rng, factors=(0.8, 1.2)):
+    """Each hyperparameter times a random factor, clipped to its range."""
+    perturbed = {}
+    for name, value in hyperparameters.items():
+        low, high = MUTABLE[name]
+        if name == 'gamma':
+            # gamma is perturbed on its horizon, 1 / (1 - gamma), so it stays below 1
+            value = 1 - (1 - value) / rng.choice(factors)
+        else:
+            value *= rng.choice(factors)
+        perturbed[name] = min(max(value, low), high)
+    perturbed['epsilon_games'] = int(perturbed['epsilon_games'])
+    return perturbed
+
+
+def _member(rank, seed, hyperparameters, win_window, connection):
+    seed_worker(seed)
+    agent = Agent(verbose=False)
+    set_hyperparameters(agent, hyperparameters)
+    while True:
+        command, *args = connection.recv()
+        if command == 'train':
+            results = train(agent=agent, render=False, plot=False, save_model=False, verbose=False,
+                            max_games=agent.n_games + args[0], win_window=win_window)
+            connection.send(results)
+        elif command == 'get':
+            connection.send((agent.model.state_dict(), agent.trainer.optimizer.state_dict(), get_hyperparameters(agent)))
+        elif command == 'set':
+            # the replay memory and the game count stay, the weights, optimizer and hyperparameters are copied
+            model_state, optimizer_state, hyperparameters = args
+            agent.model.load_state_dict(model_state)
+            agent.trainer.optimizer.load_state_dict(optimizer_state)
+            set_hyperparameters(agent, hyperparameters)
+            connection.send(True)
+        elif command == 'stop':
+            connection.close()
+            return
+
+
+class Population:
+    """Members that train side by side in their own processes, see pbt()."""
+
+    def __init__(self, size, hyperparameters, seed=0, win_window=100):
+        rng = random.Random(seed)
+        self.hyperparameters = [perturb(hyperparameters, rng, (0.5, 1, 2)) if rank else dict(hyperparameters)
+                                for rank in range(size)]
+        self.connections = []
+        self.processes = []
+        for rank in range(size):
+            parent, child = mp.Pipe()
+            process = mp.Process(target=_member, args=(rank, seed + rank, self.hyperparameters[rank], win_window, child), daemon=True)
+            process.start()
+            self.connections.append(parent)
+            self.processes.append(process)
+
+    def train(self, games):
+        for connection in self.connections:
+            connection.send(('train', games))
+        return [connection.recv() for connection in self.connections]
+
+    def get(self, rank):
+        self.connections[rank].send(('get',))
+        return self.connections[rank].recv()
+
+    def copy(self, source, target, hyperparameters):
+        model_state, optimizer_state, _ = self.get(source)
+        self.connections[target].send(('set', model_state, optimizer_state, hyperparameters))
+        self.connections[target].recv()
+        self.hyperparameters[target] = hyperparameters
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(('stop',))
+        for process in self.processes:
+            process.join()
+
+
+def pbt(size=8, rounds=20, games=100, fraction=0.25, seed=0, max_seconds=None, verbose=True, out=None):
+    """Population based training: every round each member plays `games` games, then the worst
+    `fraction` of the members copy the weights and optimizer of one of the best and perturb its
+    hyperparameters. Returns the history of every round and the state of the best member."""
+    if rounds < 1:
+        raise ValueError(f'pbt needs at least one round, got {rounds}')
+
+    rng = random.Random(seed)
+    # the rolling win rate members are ranked on covers exactly the games of one round
+    population = Population(size, {'lr': LR, 'gamma': GAMMA, 'epsilon_games': EPSILON_GAMES}, seed, win_window=games)
+    n_replaced = max(1, int(size * fraction))
+    history = []
+    start_time = time.perf_counter()
+
+    try:
+        for n_round in range(rounds):
+            results = population.train(games)
+            ranking = sorted(range(size), key=lambda rank: -results[rank]['win_rate'])
+            history.append({
+                'round': n_round,
+                'seconds': time.perf_counter() - start_time,
+                'members': [dict(population.hyperparameters[rank], rank=rank, win_rate=results[rank]['win_rate'],
+                                 mean_reward=results[rank]['mean_reward']) for rank in range(size)],
+            })
+            if verbose:
+                best = ranking[0]
+                print(f"Round {n_round}: best member {best}, win rate {results[best]['win_rate']:.2f}, "
+                      f"population mean {np.mean([result['win_rate'] for result in results]):.2f}, "
+                      + ', '.join(f"{name}={value:.4g}" for name, value in population.hyperparameters[best].items()))
+
+            if max_seconds is not None and time.perf_counter() - start_time >= max_seconds:
+                break
+            if n_round == rounds - 1:
+                break
+
+            # exploit and explore
+            for target in ranking[-n_replaced:]:
+                source = rng.choice(ranking[:n_replaced])
+                population.copy(source, target, perturb(population.hyperparameters[source], rng))
+
+        best = ranking[0]
+        model_state, _, hyperparameters = population.get(best)
+    finally:
+        population.close()
+
+    if out:
+        with open(out, 'w') as file:
+            json.dump(history, file, indent=2)
+    return history, model_state, hyperparameters
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Population based training over worker processes')
+    parser.add_argument('--population', type=int, default=8, help='members, one process each')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--games', type=int, default=100, help='games per member between two exploit steps')
+    parser.add_argument('--fraction', type=float, default=0.25, help='share of the members replaced every round')
+    parser.add_argument('--seconds', type=float, default=None, help='stop after the round that passes this time')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='pbt_history.json', help='hyperparameters and win rate of every member per round')
+    parser.add_argument('--model', default='pbt.pth', help='weights of the best member, saved under ./model')
+    args = parser.parse_args()
+
+    history, model_state, hyperparameters = pbt(args.population, args.rounds, args.games, args.fraction, args.seed,
+                                                args.seconds, out=args.out)
+    model = Agent(verbose=False).model
+    model.load_state_dict(model_state)
+    model.save(args.model)
+    print('Best hyperparameters: ' + ', '.join(f'{name}={value:.4g}' for name, value in hyperparameters.items()))
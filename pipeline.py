@@ -0,0 +1,169 @@
+import copy
+import threading
+import time
+from agent import Agent, take_action
+from game_train import MazeGame
+from stats import RollingStats
+
+
+class PipelinedTrainer:
+    """Runs the game in an actor thread while a learner thread keeps training on the replay memory.
+
+    The learner trains agent.model, the actor plays with its own copy (agent.actor_model) and
+    picks up new weights only between games, while the learner is not in the middle of an update.
+    """
+
+    def __init__(self, agent, game, min_memory=None, sync_every_games=1, scheduler=None):
+        self.agent = agent
+        self.game = game
+        self.min_memory = min_memory or agent.batch_size   # learner waits for this many transitions
+        self.sync_every_games = sync_every_games
+
+        # with a scheduler the learner keeps to its replay ratio and the actor waits when it's too far ahead
+        self.scheduler = scheduler
+
+        agent.game = game
+        agent.actor_model = copy.deepcopy(agent.model)
+
+        self.memory_lock = threading.Lock() # guards the replay memory
+        self.model_lock = threading.Lock()  # guards agent.model while it is updated or copied
+        self.stop = threading.Event()
+        self.version = 0                    # learner updates so far
+        self.actor_version = 0              # learner updates the actor has picked up
+
+        # utilization stats
+        self.n_steps = 0
+        self.updates = 0
+        self.weight_swaps = 0
+        self.actor_busy = 0.0
+        self.learner_busy = 0.0
+        self.throttled = 0.0
+
+    def _learner(self):
+        while not self.stop.is_set():
+            if self.scheduler.updates_due() == 0 if self.scheduler else len(self.agent.memory) < self.min_memory:
+                time.sleep(0.001)
+                continue
+
+            start = time.perf_counter()
+            with self.memory_lock:
+                states, actions, rewards, next_states, is_dones = self.agent.memory.sample(self.agent.batch_size)
+            with self.model_lock:
+                self.agent.learner.train_step(states, actions, rewards, next_states, is_dones)
+                self.version += 1
+            self.updates += 1
+            if self.scheduler:
+                self.scheduler.record_update(len(states))
+            self.learner_busy += time.perf_counter() - start
+
+    def _swap_weights(self):
+        # safe point: the actor is between games and the lock keeps the learner out of an update
+        with self.model_lock:
+            self.agent.actor_model.load_state_dict(self.agent.model.state_dict())
+            self.actor_version = self.version
+        self.weight_swaps += 1
+
+    def run(self, max_games=None, max_seconds=None, win_window=100, verbose=True, save_model=False, file_name='model.pth'):
+        agent, game = self.agent, self.game
+        results = [0, 0, 0, 0, 0]
+        record = 0
+        stats = RollingStats(win_window)
+
+        learner = threading.Thread(target=self._learner, daemon=True)
+        start_time = time.perf_counter()
+        learner.start()
+
+        try:
+            while True:
+                start = time.perf_counter()
+                current_state, agent_action, reward, new_state, is_done, win_condition, has_moved = take_action(agent, game)
+                self.n_steps += has_moved
+                with self.memory_lock:
+                    agent.remember(current_state, agent_action, reward, new_state, is_done)
+
+                if self.scheduler:
+                    self.scheduler.collect()
+                    throttle_start = time.perf_counter()
+                    while self.scheduler.actor_ahead() and learner.is_alive():
+                        time.sleep(0.0005)
+                    self.throttled += time.perf_counter() - throttle_start
+                    start += time.perf_counter() - throttle_start
+
+                if is_done:
+                    game.reset(agent.n_games + 1)
+                    agent.n_games += 1
+                    results[win_condition - 1] += 1
+                    stats.update(reward, win_condition in (1, 2))
+                    if agent.n_games % self.sync_every_games == 0 and self.version != self.actor_version:
+                        self._swap_weights()
+
+                    # save the learner's weights on a new record like train(), outside of an update
+                    if reward > record:
+                        record = reward
+                        if save_model:
+                            with self.model_lock:
+                                agent.model.save(file_name)
+
+                    if verbose:
+                        print(f'Game: {agent.n_games}, Reward: {reward}, Updates: {self.updates}, Win rate: {stats.win_rate:.2f}')
+
+                self.actor_busy += time.perf_counter() - start
+
+                elapsed = time.perf_counter() - start_time
+                if is_done and ((max_games is not None and agent.n_games >= max_games) or (max_seconds is not None and elapsed >= max_seconds)):
+                    break
+        finally:
+            self.stop.set()
+            learner.join()
+
+        elapsed = time.perf_counter() - start_time
+        return {
+            'games': agent.n_games,
+            'steps': self.n_steps,
+            'seconds': elapsed,
+            'wins': results[0] + results[1],
+            'losses': results[2] + results[3],
+            'ties': results[4],
+            'win_rate': stats.win_rate,
+            'record': record,
+            'updates': self.updates,
+            'weight_swaps': self.weight_swaps,
+            'steps_per_second': self.n_steps / elapsed,
+            'updates_per_second': self.updates / elapsed,
+            # the threads overlap when the utilizations add up to more than 1
+            'actor_utilization': self.actor_busy / elapsed,
+            'learner_utilization': self.learner_busy / elapsed,
+            'actor_throttled': self.throttled / elapsed,
+        }
+
+
+def train_pipelined(agent=None, render=False, max_games=None, max_seconds=None, win_window=100, verbose=True, scheduler=None,
+                    save_model=True, file_name='model.pth'):
+    """Returns the stats of the run and the agent, whose weights are also saved on every new record."""
+    if agent is None:
+        agent = Agent(verbose=verbose)
+    trainer = PipelinedTrainer(agent, MazeGame(render=render), scheduler=scheduler)
+    stats = trainer.run(max_games, max_seconds, win_window, verbose, save_model, file_name)
+    if verbose:
+        print(', '.join(f'{key}: {value:.2f}' if isinstance(value, float) else f'{key}: {value}' for key, value in stats.items()))
+    return stats, agent
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Train with the game and the learner running in separate threads')
+    parser.add_argument('--games', type=int, default=None)
+    parser.add_argument('--seconds', type=float, default=None)
+    parser.add_argument('--render', action='store_true')
+    parser.add_argument('--replay-ratio', type=float, default=None, help='replayed samples per collected transition')
+    parser.add_argument('--warmup', type=int, default=1000, help='transitions collected before training, with --replay-ratio')
+    parser.add_argument('--out', default='model.pth', help='file name in ./model, saved on every new record')
+    args = parser.parse_args()
+
+    scheduler = None
+    if args.replay_ratio is not None:
+        from scheduler import ReplayRatioScheduler
+        from agent import BATCH_SIZE
+        scheduler = ReplayRatioScheduler(args.replay_ratio, BATCH_SIZE, args.warmup)
+    train_pipelined(render=args.render, max_games=args.games, max_seconds=args.seconds, scheduler=scheduler, file_name=args.out)
@@ -0,0 +1,48 @@
+class LookaheadPlanner:
+    """Depth-limited search over the game rules using MazeGame.snapshot/restore."""
+
+    def __init__(self, depth=3):
+        self.depth = depth          # number of player moves to look ahead
+        self.expanded = 0           # number of simulated steps in the last search
+
+    def get_action(self, game):
+
+        self.expanded = 0
+
+        # the search must not draw anything, rendering is restored afterwards
+        render = game.render
+        game.render = False
+        try:
+            _, move = self._search(game, self.depth)
+        finally:
+            game.render = render
+
+        return move
+
+    def _search(self, game, depth):
+
+        best_value = None
+        best_move = None
+
+        for move in range(4):
+            if not game.is_action_valid(move):
+                continue
+
+            snapshot = game.snapshot()
+            reward, is_done, _ = game.play_step(move)
+            self.expanded += 1
+
+            # the game reward is cumulative, so the leaf reward is the value of the whole line
+            value = reward
+            if not is_done and depth > 1:
+                next_value, _ = self._search(game, depth - 1)
+                if next_value is not None:
+                    value = next_value
+
+            game.restore(snapshot)
+
+            if best_value is None or value > best_value:
+                best_value = value
+                best_move = move
+
+        return best_value, best_move
@@ -0,0 +1,140 @@
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Listener, Client
+import numpy as np
+import torch
+from model import Linear_QNet
+
+# default socket shared by the server and its clients
+ADDRESS = '/tmp/maze-rl-policy.sock'
+
+# requests are batched until the batch is full or the oldest request waited this long (seconds)
+MAX_BATCH = 256
+MAX_LATENCY = 0.002
+
+
+class PolicyServer:
+    """Serves Q-values for many game workers over a Unix socket, one forward pass per batch."""
+
+    def __init__(self, model, address=ADDRESS, max_batch=MAX_BATCH, max_latency=MAX_LATENCY):
+        self.model = model
+        self.address = address
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.requests = queue.Queue()       # (connection, observation bytes)
+        self.lock = threading.Lock()        # guards the model while weights are swapped
+        self.running = False
+        self.clients = 0                    # connected workers, each has at most one pending request
+        self.clients_lock = threading.Lock()    # guards clients, updated by the accept and read threads
+        self.batches = 0                    # number of forward passes
+        self.served = 0                     # number of answered requests
+
+    def start(self):
+        if os.path.exists(self.address):
+            os.remove(self.address)
+        self.listener = Listener(self.address, family='AF_UNIX')
+        self.running = True
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def serve_forever(self):
+        self.start()
+        while self.running:
+            time.sleep(1)
+
+    def close(self):
+        self.running = False
+        self.listener.close()
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+    def update_weights(self, state_dict):
+        with self.lock:
+            self.model.load_state_dict(state_dict)
+
+    def _accept_loop(self):
+        while self.running:
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                break
+            with self.clients_lock:
+                self.clients += 1
+            threading.Thread(target=self._read_loop, args=(connection,), daemon=True).start()
+
+    def _read_loop(self, connection):
+        while self.running:
+            try:
+                self.requests.put((connection, connection.recv_bytes()))
+            except (EOFError, OSError):
+                connection.close()
+                with self.clients_lock:
+                    self.clients -= 1
+                break
+
+    def _batch_loop(self):
+        while self.running:
+            batch = [self.requests.get()]
+
+            # keep collecting until the first request reaches its deadline
+            # or every connected worker is waiting for an answer
+            deadline = time.perf_counter() + self.max_latency
+            while len(batch) < min(self.max_batch, self.clients):
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            states = np.stack([np.frombuffer(observation, dtype=np.float32) for _, observation in batch])
+            with self.lock, torch.no_grad():
+                predictions = self.model(torch.from_numpy(states)).numpy()
+
+            for (connection, _), prediction in zip(batch, predictions):
+                try:
+                    connection.send_bytes(prediction.tobytes())
+                except OSError:
+                    pass
+
+            self.batches += 1
+            self.served += len(batch)
+
+
+class PolicyClient:
+    """Drop-in replacement for a local model forward pass, used by each game worker."""
+
+    def __init__(self, address=ADDRESS):
+        self.connection = Client(address, family='AF_UNIX')
+
+    def predict(self, state):
+        self.connection.send_bytes(np.asarray(state, dtype=np.float32).tobytes())
+        return np.frombuffer(self.connection.recv_bytes(), dtype=np.float32)
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', default='./model/model.pth', help='weights to serve')
+    parser.add_argument('--address', default=ADDRESS, help='unix socket path')
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH)
+    parser.add_argument('--max-latency', type=float, default=MAX_LATENCY, help='seconds')
+    args = parser.parse_args()
+
+    model = Linear_QNet(288, 256, 4)
+    model.load_state_dict(torch.load(args.model))
+    model.eval()
+
+    server = PolicyServer(model, args.address, args.max_batch, args.max_latency)
+    print(f"Serving {args.model} on {args.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.close()
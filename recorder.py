@@ -0,0 +1,61 @@
+import json
+from maze_core import Layout, action_index
+
+# one episode per line: the maze layout and the moves as a string of action indexes
+# the mold trajectory is not stored, it is re-derived by replaying the moves
+
+
+class EpisodeRecorder:
+
+    def __init__(self, file_name):
+        self.file = open(file_name, 'a')
+        self.layout = None
+        self.moves = []
+
+    def start(self, layout):
+        self.layout = layout
+        self.moves = []
+
+    def record(self, action):
+        self.moves.append(str(action_index(action)))
+
+    def finish(self, win_condition, reward):
+        write_episode(self.file, make_episode(self.layout, self.moves, win_condition, reward))
+
+    def close(self):
+        self.file.close()
+
+
+def make_episode(layout, moves, win_condition, reward):
+    toaster, butter, barriers = layout
+    return {
+        'toaster': list(toaster),
+        'butter': list(butter),
+        'barriers': [coord for barrier in barriers for coord in barrier],
+        'actions': ''.join(str(move) for move in moves),
+        'result': win_condition,
+        'reward': reward,
+    }
+
+
+def write_episode(file, episode):
+    file.write(json.dumps(episode, separators=(',', ':')) + '\n')
+    file.flush()
+
+
+def load_episodes(file_name):
+    with open(file_name) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def get_layout(episode):
+    barriers = episode['barriers']
+    return Layout(tuple(episode['toaster']), tuple(episode['butter']),
+                  tuple((barriers[i], barriers[i + 1]) for i in range(0, len(barriers), 2)))
+
+
+def replay(game, episode, game_id=0):
+    """Resets the game to the recorded maze and yields the result of every recorded move."""
+    game.reset(game_id, get_layout(episode))
+    for move in episode['actions']:
+        yield game.play_step(int(move))
@@ -0,0 +1,219 @@
+from functools import lru_cache
+import numpy as np
+from maze_core import state_sections
+
+# a compact record of the game state behind an observation: cells instead of coordinates and
+# bitmasks instead of padded position lists, about 60 bytes against 288 features. get_state lists
+# positions in (x, y) order, so materialize(encode(observations)) gives back the same observations,
+# and a new observation encoding only needs a new materialize.
+
+# set-like parts of the observation and the positions their bits stand for
+CELL_SETS = ('visited_positions', 'possible_toaster', 'known_heat', 'possible_butter', 'mold_visited')
+
+
+@lru_cache(maxsize=None)
+def _layout(grid_w, grid_h):
+    cells = np.array([(x, y) for x in range(0, grid_w, 2) for y in range(0, grid_h, 2)])
+    barriers = np.array([(x, y) for x in range(grid_w) for y in range(grid_h) if (x % 2 != 0) != (y % 2 != 0)])
+
+    # (x, y) -> index in cells or barriers, both are in (x, y) order like the observation
+    index = np.full((grid_w, grid_h), -1)
+    index[cells[:, 0], cells[:, 1]] = np.arange(len(cells))
+    index[barriers[:, 0], barriers[:, 1]] = np.arange(len(barriers))
+
+    sections = {}
+    offset = 0
+    for name, kind, count in state_sections(grid_w, grid_h):
+        size = 2 * count if kind == 'pairs' else 1
+        sections[name] = (offset, count)
+        offset += size
+
+    # positions ending with the padding (-1, -1), for lookups of index len(positions)
+    cells, barriers = (np.vstack([positions, (-1, -1)]).astype(np.int16) for positions in (cells, barriers))
+    return cells, barriers, index, sections, offset
+
+
+@lru_cache(maxsize=None)
+def record_dtype(grid_w=11, grid_h=11):
+    cells, barriers, _, sections, _ = _layout(grid_w, grid_h)
+    cell_bytes = (len(cells) - 1 + 7) // 8
+    return np.dtype([
+        ('player', np.int8), ('mold', np.int8), ('direction', np.int8),
+        ('know_toaster', np.bool_), ('know_butter', np.bool_), ('reward', np.int16),
+        *((name, np.uint8, (cell_bytes,)) for name in CELL_SETS),
+        ('known_barriers', np.uint8, ((len(barriers) - 1 + 7) // 8,)),
+        ('mold_path', np.int8, (sections['mold_path'][1],)),
+    ])
+
+
+def _pairs(observations, section):
+    offset, count = section
+    return observations[:, offset:offset + 2 * count].reshape(len(observations), count, 2)
+
+
+def _bits(positions, index, size):
+    # one bit per position, padding (-1, -1) goes to an extra column that is dropped
+    slots = np.where(positions[..., 0] >= 0, index[positions[..., 0], positions[..., 1]], size)
+    bits = np.zeros((len(positions), size + 1), dtype=bool)
+    bits[np.arange(len(positions))[:, None], slots] = True
+    return np.packbits(bits[:, :size], axis=1, bitorder='little')
+
+
+def encode(observations, grid_w=11, grid_h=11):
+    """Records of a batch of observations."""
+    observations = np.asarray(observations, dtype=np.int64).reshape(-1, _layout(grid_w, grid_h)[4])
+    cells, barriers, index, sections, _ = _layout(grid_w, grid_h)
+    records = np.zeros(len(observations), dtype=record_dtype(grid_w, grid_h))
+
+    for name in ('player', 'mold'):
+        position = _pairs(observations, sections[name])[:, 0]
+        records[name] = index[position[:, 0], position[:, 1]]
+    for name in ('direction', 'know_toaster', 'know_butter', 'reward'):
+        records[name] = observations[:, sections[name][0]]
+    for name in CELL_SETS:
+        records[name] = _bits(_pairs(observations, sections[name]), index, len(cells) - 1)
+    records['known_barriers'] = _bits(_pairs(observations, sections['known_barriers']), index, len(barriers) - 1)
+
+    path = _pairs(observations, sections['mold_path'])
+    records['mold_path'] = np.where(path[..., 0] >= 0, index[path[..., 0], path[..., 1]], -1)
+    return records
+
+
+@lru_cache(maxsize=None)
+def _row_plan(grid_w, grid_h):
+    # columns of the x of every position encode_one reads: the positions of the bitmask sets, then
+    # the player, the mold and the mold path, and the bit of the record each bitmask set starts from
+    _, _, index, sections, _ = _layout(grid_w, grid_h)
+    dtype = record_dtype(grid_w, grid_h)
+    columns, bases = [], []
+    for name in CELL_SETS + ('known_barriers',):
+        offset, count = sections[name]
+        columns.append(offset + 2 * np.arange(count))
+        bases.append(np.full(count, dtype.fields[name][1] * 8))
+    bases = np.concatenate(bases)
+    for name in ('player', 'mold', 'mold_path'):
+        offset, count = sections[name]
+        columns.append(offset + 2 * np.arange(count))
+    columns = np.concatenate(columns)
+
+    # index tables with an extra last row and column, that the padding (-1, -1) lands on:
+    # past the record for the bits, -1 for the cells
+    n_bits = dtype.itemsize * 8
+    bit_index = np.full((grid_w + 1, grid_h + 1), n_bits)
+    bit_index[:grid_w, :grid_h] = index
+    cell_index = np.full((grid_w + 1, grid_h + 1), -1)
+    cell_index[:grid_w, :grid_h] = index
+    scalars = [sections[name][0] for name in ('direction', 'know_toaster', 'know_butter', 'reward')]
+    return columns, bases, bit_index, cell_index, scalars, dtype
+
+
+def encode_one(observation, grid_w=11, grid_h=11):
+    """Record of a single observation, the same as encode(observation)[0] in a fraction of the time."""
+    columns, bases, bit_index, cell_index, scalars, dtype = _row_plan(grid_w, grid_h)
+    observation = np.asarray(observation).astype(np.int64, copy=False)
+    xs, ys = observation[columns], observation[columns + 1]
+
+    # every bitmask set with one scatter and one packbits over the whole record
+    n = len(bases)
+    bits = np.zeros(2 * dtype.itemsize * 8, dtype=bool)
+    bits[bases + bit_index[xs[:n], ys[:n]]] = True
+    record = np.packbits(bits[:dtype.itemsize * 8], bitorder='little').view(dtype)[0]
+
+    cells = cell_index[xs[n:], ys[n:]]
+    record['player'], record['mold'] = cells[:2]
+    record['mold_path'] = cells[2:]
+    record['direction'], record['know_toaster'], record['know_butter'], record['reward'] = observation[scalars].tolist()
+    return record
+
+
+def _positions(packed, positions, count):
+    # the first count set bits in (x, y) order, sorting puts the index of the padding after them
+    size = len(positions) - 1
+    bits = np.unpackbits(packed, axis=1, count=size, bitorder='little')
+    indexes = np.int16(size) - bits * (np.int16(size) - np.arange(size, dtype=np.int16))
+    indexes.sort(axis=1)
+    return np.take(positions, indexes[:, :count], axis=0).reshape(len(packed), 2 * count)
+
+
+def materialize(records, grid_w=11, grid_h=11):
+    """Observations of a batch of records, as float32 rows like the replay memory returns them."""
+    cells, barriers, _, sections, size = _layout(grid_w, grid_h)
+    observations = np.empty((len(records), size), dtype=np.float32)
+
+    def put(name, values):
+        offset = sections[name][0]
+        values = values.reshape(len(records), -1)
+        observations[:, offset:offset + values.shape[1]] = values
+
+    # np.take is much faster than fancy indexing on these small tables
+    put('player', np.take(cells, records['player'], axis=0))
+    put('mold', np.take(cells, records['mold'], axis=0))
+    for name in ('direction', 'know_toaster', 'know_butter', 'reward'):
+        put(name, records[name])
+    for name in CELL_SETS:
+        put(name, _positions(records[name], cells, sections[name][1]))
+    put('known_barriers', _positions(records['known_barriers'], barriers, sections['known_barriers'][1]))
+    put('mold_path', np.take(cells, records['mold_path'], axis=0, mode='wrap'))
+    return observations
+
+
+def canonical(observations, grid_w=11, grid_h=11):
+    """The observations with the positions of every set-like part in (x, y) order."""
+    return materialize(encode(observations, grid_w, grid_h), grid_w, grid_h)
+
+
+if __name__ == '__main__':
+    import argparse
+    import random
+    import time
+    from game_train import MazeGame
+    from replay import ReplayBuffer, RecordReplayBuffer
+
+    parser = argparse.ArgumentParser(description='Checks that records give back the observations and compares replay memories')
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    game = MazeGame(render=False)
+    buffers = [ReplayBuffer(100000), RecordReplayBuffer(100000)]
+    push_seconds = [0.0, 0.0]
+    observations = []
+    for n_game in range(args.games):
+        game.reset(n_game)
+        state = game.get_state()
+        is_done = False
+        while not is_done:
+            moves = [move for move in range(4) if game.is_action_valid(move)]
+            if not moves:
+                break
+            action = random.choice(moves)
+            reward, is_done, _ = game.play_step(action)
+            next_state = game.get_state()
+            for n, buffer in enumerate(buffers):
+                start = time.perf_counter()
+                buffer.push(state, action, reward, next_state, is_done)
+                push_seconds[n] += time.perf_counter() - start
+            observations.append(state)
+            state = next_state
+
+    observations = np.array(observations)
+    assert (materialize(encode(observations)) == observations).all()
+    assert all(encode_one(observation) == record for observation, record in zip(observations, encode(observations)))
+    print(f'Observations: {len(observations)}, all rebuilt exactly from {record_dtype().itemsize} byte records')
+
+    # both memories hold the same transitions and sample them alike
+    random.seed(args.seed)
+    expected = buffers[0].sample(args.batch_size)
+    random.seed(args.seed)
+    sampled = buffers[1].sample(args.batch_size)
+    assert all((a == b).all() for a, b in zip(expected, sampled))
+
+    print(f"{'memory':>20} {'bytes/transition':>17} {'push us':>8} {'sample ms':>10}")
+    for buffer, seconds in zip(buffers, push_seconds):
+        start = time.perf_counter()
+        for _ in range(20):
+            buffer.sample(args.batch_size)
+        print(f'{type(buffer).__name__:>20} {buffer.nbytes / buffer.capacity:>17.1f} {seconds / len(observations) * 1e6:>8.1f} '
+              f'{(time.perf_counter() - start) / 20 * 1000:>10.2f}')
@@ -0,0 +1,171 @@
+from maze_core import Point
+
+# pygame is only loaded and initialized when a game is rendered,
+# so headless workers never pay for it or need a display
+pygame = None
+
+def _init_pygame():
+    global pygame
+    if pygame is None:
+        import pygame as _pygame
+        _pygame.init()
+        pygame = _pygame
+
+# RGB colors
+WHITE = (255, 255, 255)
+RED = (200, 0, 0)
+LIGHT_RED = (150, 50, 50)
+BLUE = (0, 0, 200)
+GREEN = (0, 200, 0)
+BLACK = (0, 0, 0)
+YELLOW = (200, 200, 0)
+
+# Game settings
+OFF_SET = 10
+GRID_SIZE = 50
+FPS = 60
+
+# rendered text is cached, the font is created once pygame is initialized
+_font = None
+_glyphs = {}
+
+def _get_glyph(text, color):
+    global _font
+    glyph = _glyphs.get((text, color))
+    if glyph is None:
+        if _font is None:
+            _font = pygame.font.Font(None, 36)
+        glyph = _font.render(text, True, color)
+        _glyphs[(text, color)] = glyph
+    return glyph
+
+
+class PygameRenderer:
+    """Draws a maze game in a pygame window, only redrawing the cells that changed."""
+
+    def __init__(self, grid_w = 11, grid_h = 11, fps = FPS):
+        _init_pygame()
+        self.w = GRID_SIZE * (grid_w + 1) + 2*OFF_SET
+        self.h = GRID_SIZE * (grid_h + 1) + 2*OFF_SET
+        self.grid_w = grid_w
+        self.grid_h = grid_h
+        self.display = pygame.display.set_mode((self.w, self.h))
+        self.clock = pygame.time.Clock()
+        self.fps = fps
+
+        # static background and what is currently drawn in each cell
+        self._background = None
+        self._drawn_cells = {}
+        self._full_redraw = True
+
+    def reset(self, game_id):
+        pygame.display.set_caption("Maze Game - ID: " + str(game_id))
+        self._full_redraw = True
+
+    def show_message(self, message):
+
+        self.display.fill(BLACK)
+        self.display.blit(_get_glyph(message, WHITE), (self.w/4, self.h/4))
+        pygame.display.flip()
+
+        # the message covers the board, the next frame has to draw everything again
+        self._full_redraw = True
+
+    def _get_background(self):
+
+        # grid lines never change, so they are drawn once per game window
+        if self._background is None:
+            self._background = pygame.Surface((self.w, self.h)).convert()
+            self._background.fill(BLACK)
+            for x in range(0, int((self.grid_w + 1) / 2) + 1, 1):
+                pygame.draw.line(self._background, WHITE, (x * GRID_SIZE * 2 + OFF_SET, 0 + OFF_SET), (x * GRID_SIZE * 2 + OFF_SET, self.h - OFF_SET), 2)
+            for y in range(0, int((self.grid_h + 1) / 2) + 1, 1):
+                pygame.draw.line(self._background, WHITE, (0 + OFF_SET, y * GRID_SIZE * 2 + OFF_SET), (self.w - OFF_SET, y * GRID_SIZE * 2 + OFF_SET), 2)
+        return self._background
+
+    def _get_cell_key(self, game, pos, possible_butter):
+
+        # everything that is drawn inside a cell, the cell is redrawn only when this changes
+        # barrier lines end on the first pixel of the next cell, so those barriers count too
+        sides = (Point(pos.x, pos.y - 1), Point(pos.x, pos.y + 1), Point(pos.x - 1, pos.y), Point(pos.x + 1, pos.y),
+                 Point(pos.x - 2, pos.y - 1), Point(pos.x - 2, pos.y + 1), Point(pos.x - 1, pos.y - 2), Point(pos.x + 1, pos.y - 2))
+        return (
+            pos in game.known_heat,
+            pos in possible_butter,
+            pos == game.player,
+            pos == game.mold,
+            game.know_toaster and pos == game.toaster,
+            int(game.distances[pos.x, pos.y]) if pos in game.visited_positions else -1,
+            tuple(side in game.known_barriers for side in sides))
+
+    def _draw_cell(self, game, pos, key):
+
+        is_heat, is_possible_butter, is_player, is_mold, is_toaster, distance, _ = key
+
+        cell = pygame.Rect(pos.x * GRID_SIZE + OFF_SET, pos.y * GRID_SIZE + OFF_SET, GRID_SIZE * 2, GRID_SIZE * 2)
+        self.display.set_clip(cell)
+        self.display.blit(self._get_background(), cell, cell)
+
+        # draw toaster heat if is discovered
+        if is_heat:
+            pygame.draw.rect(self.display, LIGHT_RED, (pos.x * GRID_SIZE + 2*OFF_SET, pos.y * GRID_SIZE + 2*OFF_SET, GRID_SIZE * 2 - 2*OFF_SET, GRID_SIZE * 2 - 2*OFF_SET))
+
+        # draw possible butter positions
+        if is_possible_butter:
+            pygame.draw.rect(self.display, YELLOW, (pos.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), pos.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
+
+        # draw player
+        if is_player:
+            pygame.draw.rect(self.display, GREEN, (pos.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), pos.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
+
+        # draw mold
+        if is_mold:
+            pygame.draw.rect(self.display, BLUE, (pos.x * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), pos.y * GRID_SIZE + OFF_SET + int(GRID_SIZE/2), GRID_SIZE, GRID_SIZE))
+
+        # draw toaster
+        if is_toaster:
+            self.display.blit(_get_glyph("T", WHITE), (pos.x * GRID_SIZE + 2*GRID_SIZE - 2*OFF_SET, pos.y * GRID_SIZE + OFF_SET * 2))
+
+        # draw known barriers, the clip keeps only the half that lies inside this cell
+        for barrier in game.known_barriers:
+            # check if is an horizontal barrier or a vertical barrier
+            if barrier.x % 2 == 0:
+                pygame.draw.line(self.display, RED, (barrier.x * GRID_SIZE + OFF_SET, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE), (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE * 2, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE), 10)
+            else:
+                pygame.draw.line(self.display, RED, (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE, barrier.y * GRID_SIZE + OFF_SET), (barrier.x * GRID_SIZE + OFF_SET + GRID_SIZE, barrier.y * GRID_SIZE + OFF_SET + GRID_SIZE * 2), 10)
+
+        # draw heuristic (distance to butter) on visited positions
+        if distance != -1:
+            self.display.blit(_get_glyph(str(distance), YELLOW), (pos.x * GRID_SIZE + OFF_SET * 2, pos.y * GRID_SIZE + OFF_SET * 2))
+
+        self.display.set_clip(None)
+        return cell
+
+    def draw(self, game):
+
+        if self._full_redraw:
+            self.display.blit(self._get_background(), (0, 0))
+            self._drawn_cells = {}
+
+        # only redraw the cells whose content changed since the last frame
+        possible_butter = set(game.possible_butter)
+        dirty = []
+        for pos in game.valid_positions:
+            key = self._get_cell_key(game, pos, possible_butter)
+            if self._drawn_cells.get(pos) != key:
+                dirty.append(self._draw_cell(game, pos, key))
+                self._drawn_cells[pos] = key
+
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        elif dirty:
+            pygame.display.update(dirty)
+
+        # keep the window responsive
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                quit()
+
+        self.clock.tick(self.fps)
@@ -0,0 +1,144 @@
+import random
+import numpy as np
+import records
+
+
+class ReplayBuffer:
+    """Ring buffer of transitions that stores every observation once.
+
+    Observations are kept in int8, except the last wide_columns features (the running reward)
+    which are kept in int16. The next_state of the transition in slot i is the observation in
+    slot i + 1: it is written ahead when the transition is pushed, and the next push reuses it
+    when its state is the same observation, which is always the case inside an episode. Slots
+    holding only a successor (the terminal observation of an episode) are never sampled.
+    """
+
+    # per slot arrays, reallocated by resize
+    arrays = ('obs', 'obs_wide', 'actions', 'rewards', 'dones', 'valid')
+
+    def __init__(self, capacity, state_size=288, wide_columns=1):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.narrow = state_size - wide_columns
+
+        self._allocate_obs(capacity, wide_columns)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.int32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.valid = np.zeros(capacity, dtype=bool)     # slot holds a transition, not only a successor
+
+        self.pos = 0                # slot of the next transition
+        self.head_written = False   # the observation at pos was written ahead as a successor
+        self.count = 0              # number of valid transitions
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.arrays)
+
+    def push(self, state, action, reward, next_state, is_done):
+
+        state = np.asarray(state)
+
+        # start a new chain when the state is not the successor of the previous transition
+        if self.head_written and not self._obs_equal(self.pos, state):
+            self.pos = (self.pos + 1) % self.capacity
+            self.head_written = False
+        if not self.head_written:
+            self._write_obs(self.pos, state)
+
+        # an action index, or a one-hot list for compatibility
+        self.actions[self.pos] = action if np.ndim(action) == 0 else np.argmax(action)
+        self.rewards[self.pos] = reward
+        self.dones[self.pos] = is_done
+        self.valid[self.pos] = True
+        self.count += 1
+
+        # write the successor ahead, it evicts the oldest slot
+        self.pos = (self.pos + 1) % self.capacity
+        self._write_obs(self.pos, np.asarray(next_state))
+        self.head_written = True
+
+    def sample(self, batch_size):
+
+        # every transition if there are not enough of them, like sampling from the old deque
+        indexes = np.flatnonzero(self.valid)
+        if len(indexes) > batch_size:
+            indexes = indexes[random.sample(range(len(indexes)), batch_size)]
+
+        next_indexes = (indexes + 1) % self.capacity
+        return (self._get_obs(indexes), self.actions[indexes].astype(np.int64), self.rewards[indexes].astype(np.float32),
+                self._get_obs(next_indexes), self.dones[indexes])
+
+    def resize(self, capacity):
+        """Reallocates the buffer with a new capacity, keeping the newest transitions."""
+
+        # slots from oldest to newest, the written-ahead successor at pos is the newest
+        keep = min(capacity, self.capacity)
+        order = (self.pos + 1 + np.arange(self.capacity)) % self.capacity
+        order = order[self.capacity - keep:]
+
+        for name in self.arrays:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:keep] = old[order]
+            setattr(self, name, new)
+
+        self.capacity = capacity
+        self.pos = (keep - 1) % capacity if self.head_written else 0
+        self.count = int(self.valid.sum())
+
+    def _allocate_obs(self, capacity, wide_columns):
+        self.obs = np.zeros((capacity, self.narrow), dtype=np.int8)
+        self.obs_wide = np.zeros((capacity, wide_columns), dtype=np.int16)
+
+    def _write_obs(self, slot, obs):
+        if self.valid[slot]:
+            self.valid[slot] = False
+            self.count -= 1
+        self.obs[slot] = obs[:self.narrow]
+        self.obs_wide[slot] = obs[self.narrow:]
+
+    def _obs_equal(self, slot, obs):
+        return np.array_equal(self.obs[slot], obs[:self.narrow]) and np.array_equal(self.obs_wide[slot], obs[self.narrow:])
+
+    def _get_obs(self, indexes):
+        obs = np.empty((len(indexes), self.state_size), dtype=np.float32)
+        obs[:, :self.narrow] = self.obs[indexes]
+        obs[:, self.narrow:] = self.obs_wide[indexes]
+        return obs
+
+
+class RecordReplayBuffer(ReplayBuffer):
+    """ReplayBuffer that keeps a compact record of the game state instead of every observation.
+
+    Observations are encoded into records when pushed and rebuilt for the whole batch when
+    sampled, see records.py. The records don't depend on the observation encoding, only
+    records.materialize does. For a fifth of the memory, a push costs about 50 us against 20 us
+    with ReplayBuffer, mostly records.encode_one, and sampling is about 3.5 times slower.
+    """
+
+    arrays = ('records', 'actions', 'rewards', 'dones', 'valid')
+
+    def __init__(self, capacity, state_size=288, grid_w=11, grid_h=11):
+        self.grid = (grid_w, grid_h)
+        super().__init__(capacity, state_size)
+
+    def _allocate_obs(self, capacity, wide_columns):
+        self.records = np.zeros(capacity, dtype=records.record_dtype(*self.grid))
+
+    def _write_obs(self, slot, obs):
+        if self.valid[slot]:
+            self.valid[slot] = False
+            self.count -= 1
+        self.records[slot] = records.encode_one(obs, *self.grid)
+        self.head_obs = obs.copy()
+
+    def _obs_equal(self, slot, obs):
+        # only ever asked about the head, the last observation written, kept to skip encoding obs
+        return np.array_equal(self.head_obs, obs)
+
+    def _get_obs(self, indexes):
+        return records.materialize(self.records[indexes], *self.grid)
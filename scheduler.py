@@ -0,0 +1,71 @@
+class ReplayRatioScheduler:
+    """Decides how many train steps to run so replayed samples / collected samples stays at replay_ratio.
+
+    Nothing is trained during the first `warmup` collected transitions. After that, every
+    collected transition adds replay_ratio samples to the replay budget, spent one batch at a
+    time. When collection runs in parallel with the learner, actor_ahead() tells the actor to
+    wait while the learner is more than `slack` samples behind.
+    """
+
+    def __init__(self, replay_ratio=8.0, batch_size=1000, warmup=1000, max_updates_per_step=None, slack=None):
+        self.replay_ratio = replay_ratio
+        self.batch_size = batch_size
+        self.warmup = warmup
+        self.max_updates_per_step = max_updates_per_step
+        self.slack = slack if slack is not None else 2 * batch_size
+        self.collected = 0      # transitions collected, actor side
+        self.replayed = 0       # samples trained on, learner side
+        self.updates = 0
+
+    @property
+    def warming_up(self):
+        return self.collected < self.warmup
+
+    def collect(self, n=1):
+        self.collected += n
+
+    def _budget(self):
+        # samples the learner may still replay
+        return self.replay_ratio * max(0, self.collected - self.warmup) - self.replayed
+
+    def updates_due(self):
+        updates = int(self._budget() // self.batch_size)
+        if self.max_updates_per_step is not None:
+            updates = min(updates, self.max_updates_per_step)
+        return max(0, updates)
+
+    def record_update(self, samples):
+        self.replayed += samples
+        self.updates += 1
+
+    def actor_ahead(self):
+        return self._budget() > self.slack + self.batch_size
+
+    def stats(self):
+        return {
+            'collected': self.collected,
+            'replayed': self.replayed,
+            'updates': self.updates,
+            'replay_ratio': self.replayed / max(1, self.collected - self.warmup),
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+    from agent import Agent, train
+
+    parser = argparse.ArgumentParser(description='Compare replay ratios on headless training runs')
+    parser.add_argument('--ratios', type=float, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--games', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'ratio':>6} {'games':>6} {'steps':>6} {'updates':>8} {'real ratio':>10} {'seconds':>8} {'win rate':>8}")
+    for ratio in args.ratios:
+        scheduler = ReplayRatioScheduler(ratio, args.batch_size, args.warmup)
+        results = train(agent=Agent(batch_size=args.batch_size, verbose=False), render=False, plot=False,
+                        save_model=False, verbose=False, max_games=args.games, scheduler=scheduler)
+        stats = scheduler.stats()
+        print(f"{ratio:>6} {results['games']:>6} {results['steps']:>6} {stats['updates']:>8} {stats['replay_ratio']:>10.2f} "
+              f"{results['seconds']:>8.1f} {results['win_rate']:>8.2f}")
@@ -0,0 +1,195 @@
+import os
+import tempfile
+import numpy as np
+import torch
+
+# default file of the shared region, in memory under /dev/shm where there is one
+PATH = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'maze-rl-weights')
+
+# header: version, number of floats per slot, number of slots, magic
+HEADER = 64
+MAGIC = 0x6d617a65
+
+
+def _tensors(model):
+    # parameters and buffers in a fixed order, the same in every process for one architecture
+    return list(model.named_parameters()) + list(model.named_buffers())
+
+
+def _size(model):
+    return sum(tensor.numel() for _, tensor in _tensors(model))
+
+
+class WeightPublisher:
+    """Publishes the weights of a model to a shared memory region that WeightSubscribers map.
+
+    The region holds `slots` copies of the weights. Version v is written to slot v % slots, and only
+    then is the version counter bumped, so a reader never sees a slot that is still being written.
+    A reader keeps using its slot without copying until a newer version shows up.
+    """
+
+    def __init__(self, model, path=PATH, slots=3):
+        self.model = model
+        self.path = path
+        self.slots = slots
+        self.n_floats = _size(model)
+
+        # a fresh file, readers still mapping one left over from an earlier run keep their own copy
+        if os.path.exists(path):
+            os.remove(path)
+        region = np.memmap(path, dtype=np.uint8, mode='w+', shape=HEADER + slots * self.n_floats * 4)
+        self.header = region[:HEADER].view(np.int64)
+        self.header[1:4] = (self.n_floats, slots, MAGIC)
+        self.data = torch.from_numpy(region[HEADER:].view(np.float32).reshape(slots, self.n_floats))
+        self.publish()
+
+    @property
+    def version(self):
+        return int(self.header[0])
+
+    def publish(self, model=None):
+        """Copies the weights of model, by default the one given at creation, into the next slot."""
+        version = self.version + 1
+        slot = self.data[version % self.slots]
+        offset = 0
+        with torch.no_grad():
+            for _, tensor in _tensors(model or self.model):
+                slot[offset:offset + tensor.numel()].copy_(tensor.reshape(-1))
+                offset += tensor.numel()
+
+        # the slot is complete before readers can see its version
+        self.header[0] = version
+        return version
+
+    def close(self):
+        del self.header, self.data
+        os.remove(self.path)
+
+
+class WeightSubscriber:
+    """A model whose weights are views into the slot of the latest published version, never copies."""
+
+    def __init__(self, model, path=PATH):
+        self.model = model.eval()
+        region = np.memmap(path, dtype=np.uint8, mode='r+')
+        self.header = region[:HEADER].view(np.int64)
+        n_floats, self.slots, magic = (int(value) for value in self.header[1:4])
+        if magic != MAGIC or n_floats != _size(model):
+            raise ValueError(f'shared weights {path!r} have {n_floats} floats, the model has {_size(model)}')
+        self.data = torch.from_numpy(region[HEADER:].view(np.float32).reshape(self.slots, n_floats))
+        for _, tensor in _tensors(model):
+            tensor.requires_grad_(False)
+        self.version = 0
+        self.refresh()
+
+    def published(self):
+        return int(self.header[0])
+
+    def refresh(self):
+        """Points the model at the latest published version, returns that version."""
+        version = self.published()
+        if version != self.version:
+            slot = self.data[version % self.slots]
+            offset = 0
+            for _, tensor in _tensors(self.model):
+                tensor.data = slot[offset:offset + tensor.numel()].view(tensor.shape)
+                offset += tensor.numel()
+            self.version = version
+        return self.version
+
+    def read(self, fn):
+        """Runs fn(model) on the latest weights, again if its slot was overwritten while fn ran."""
+        while True:
+            version = self.refresh()
+            with torch.no_grad():
+                result = fn(self.model)
+
+            # the slot of version v is only rewritten by version v + slots, which starts
+            # after version v + slots - 1 has been published
+            if self.published() - version < self.slots - 1:
+                return result
+
+    def predict(self, state):
+        return self.read(lambda model: model(state))
+
+    def close(self):
+        for _, tensor in _tensors(self.model):
+            tensor.data = tensor.data.clone()
+        del self.header, self.data
+
+
+def _worker(path, hidden_size, n_reads, results):
+    import time
+    from model import Linear_QNet
+
+    subscriber = WeightSubscriber(Linear_QNet(288, hidden_size, 4), path)
+    state = torch.rand(288)
+    latencies, versions, torn = [], set(), 0
+    for _ in range(n_reads):
+        start = time.perf_counter()
+        version = subscriber.refresh()
+        latencies.append(time.perf_counter() - start)
+
+        # the publisher fills every weight of version v with v, a torn read would mix values
+        low, high = subscriber.read(lambda model: (min(p.min().item() for p in model.parameters()),
+                                                   max(p.max().item() for p in model.parameters())))
+        torn += low != high
+        versions.add(version)
+        subscriber.predict(state)
+    results.put((np.mean(latencies), len(versions), torn))
+    subscriber.close()
+
+
+if __name__ == '__main__':
+    import argparse
+    import io
+    import multiprocessing as mp
+    import time
+    from model import Linear_QNet
+
+    parser = argparse.ArgumentParser(description='Weight sync latency of shared weights against torch.load')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--hidden-size', type=int, default=256)
+    parser.add_argument('--path', default=PATH + '-bench')
+    args = parser.parse_args()
+
+    model = Linear_QNet(288, args.hidden_size, 4)
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    start = time.perf_counter()
+    for _ in range(100):
+        buffer.seek(0)
+        model.load_state_dict(torch.load(buffer))
+    load_time = (time.perf_counter() - start) / 100
+
+    # every weight of version v is v
+    with torch.no_grad():
+        for parameter in model.parameters():
+            parameter.fill_(1)
+    publisher = WeightPublisher(model, args.path)
+    results = mp.Queue()
+    workers = [mp.Process(target=_worker, args=(args.path, args.hidden_size, args.reads, results)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+
+    publish_times = []
+    while any(worker.is_alive() for worker in workers) and results.qsize() < args.workers:
+        with torch.no_grad():
+            for parameter in model.parameters():
+                parameter.fill_(publisher.version + 1)
+        start = time.perf_counter()
+        publisher.publish()
+        publish_times.append(time.perf_counter() - start)
+        time.sleep(0.001)
+
+    stats = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    publisher.close()
+
+    print(f'Weights: {publisher.n_floats * 4 / 2**20:.2f} MB, {len(publish_times)} versions published')
+    print(f'torch.load of the state dict: {load_time * 1e6:.0f} us, publish: {np.mean(publish_times) * 1e6:.0f} us')
+    for n, (latency, versions, torn) in enumerate(stats):
+        print(f'worker {n}: refresh {latency * 1e6:.1f} us, {versions} versions seen, {torn} torn reads')
+    assert all(torn == 0 for _, _, torn in stats)
@@ -0,0 +1,160 @@
+import multiprocessing as mp
+import os
+import random
+from game_train import MazeGame
+from recorder import make_episode, write_episode, load_episodes, get_layout, replay
+
+# how good each win condition is for the player: wins, then ties, then losses
+OUTCOME_SCORE = {1: 2, 2: 2, 5: 1, 3: 0, 4: 0}
+
+
+def layout_key(layout):
+    toaster, butter, barriers = layout
+    return tuple(toaster), tuple(butter), tuple(sorted(tuple(barrier) for barrier in barriers))
+
+
+class MazeSolver:
+    """Exact search of the best achievable outcome of a maze layout.
+
+    The player always knows the barriers around it and the mold moves deterministically, so the
+    rest of the game only depends on (player, mold, player waiting on the toaster, frame). Every
+    such state is solved once with the game's own rules through snapshot/restore.
+    """
+
+    def __init__(self):
+        self.game = MazeGame(render=False)
+        self.memo = {}
+
+    def solve(self, layout):
+        """Returns the best win condition, the moves reaching it and the final reward."""
+        self.game.reset(0, layout)
+        self.memo = {}
+        _, _, moves = self._solve()
+
+        # replay the moves to get the outcome and reward the game gives them
+        reward, win_condition = -100, 5
+        for reward, _, win_condition in replay(self.game, make_episode(layout, moves, None, None)):
+            pass
+        return win_condition, moves, reward
+
+    def _is_better(self, result, best):
+        if best is None or result[0] != best[0]:
+            return best is None or result[0] > best[0]
+        # win as soon as possible, lose as late as possible
+        return result[1] < best[1] if result[0] == 2 else result[1] > best[1]
+
+    def _solve(self):
+        game = self.game
+        key = (game.player, game.mold, game.player_wait, game.frame_iteration)
+        if key in self.memo:
+            return self.memo[key]
+
+        best = None
+        for move in range(4):
+            if not game.is_action_valid(move):
+                continue
+
+            snapshot = game.snapshot()
+            _, is_done, win_condition = game.play_step(move)
+            if is_done:
+                result = (OUTCOME_SCORE[win_condition], 1, (move,))
+            else:
+                score, steps, moves = self._solve()
+                result = (score, steps + 1, (move,) + moves)
+            game.restore(snapshot)
+
+            if self._is_better(result, best):
+                best = result
+
+        # no valid move is a tie, like in training
+        if best is None:
+            best = (OUTCOME_SCORE[5], 0, ())
+
+        self.memo[key] = best
+        return best
+
+
+_solver = None
+
+def solve_layout(layout):
+    # one solver per worker process
+    global _solver
+    if _solver is None:
+        _solver = MazeSolver()
+    win_condition, moves, reward = _solver.solve(layout)
+    return make_episode(layout, moves, win_condition, reward)
+
+
+def generate_layouts(n_layouts, seed=0):
+    random.seed(seed)
+    game = MazeGame(render=False)
+    layouts = []
+    for i in range(n_layouts):
+        game.reset(i)
+        layouts.append(game.get_layout())
+    return layouts
+
+
+def solve_corpus(layouts, cache_file=None, workers=None):
+    """Solves every layout in parallel, reusing the solutions already in cache_file.
+
+    Solutions are episodes in the recorder format, so they can also be watched with
+    game_simulator.py --replay.
+    """
+    cache = {}
+    if cache_file and os.path.exists(cache_file):
+        cache = {layout_key(get_layout(episode)): episode for episode in load_episodes(cache_file)}
+
+    missing = list({layout_key(layout): layout for layout in layouts if layout_key(layout) not in cache}.values())
+    if missing:
+        file = open(cache_file, 'a') if cache_file else None
+        with mp.Pool(processes=workers or os.cpu_count()) as pool:
+            for episode in pool.imap_unordered(solve_layout, missing, chunksize=8):
+                cache[layout_key(get_layout(episode))] = episode
+                if file:
+                    write_episode(file, episode)
+        if file:
+            file.close()
+
+    return [cache[layout_key(layout)] for layout in layouts]
+
+
+def prefill_replay(agent, episodes):
+    """Plays the solved moves and stores the transitions in the agent's replay memory."""
+    game = MazeGame(render=False)
+    for episode in episodes:
+        game.reset(0, get_layout(episode))
+        state = game.get_state()
+        if not episode['actions']:
+            continue
+        for move in episode['actions']:
+            action = int(move)
+            reward, is_done, _ = game.play_step(action)
+            next_state = game.get_state()
+            agent.remember(state, action, reward, next_state, is_done)
+            state = next_state
+
+
+def pretrain(agent, episodes, updates=1000):
+    """Fills the replay memory with the solved games and trains the model on them."""
+    prefill_replay(agent, episodes)
+    for _ in range(updates):
+        agent.train_long_memory()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Solve random mazes exactly to get expert demonstrations')
+    parser.add_argument('--layouts', type=int, default=1000, help='number of random layouts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='solutions.jsonl', help='cache of solved layouts')
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    episodes = solve_corpus(generate_layouts(args.layouts, args.seed), args.out, args.workers)
+
+    results = [0, 0, 0, 0, 0]
+    for episode in episodes:
+        results[episode['result'] - 1] += 1
+    print(f"Layouts: {len(episodes)}, Wins: {results[0] + results[1]}, Losses: {results[2] + results[3]}, Ties: {results[4]}")
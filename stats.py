@@ -0,0 +1,149 @@
+import math
+from collections import deque
+
+
+class RollingStats:
+    """Running statistics of the game results, each update is O(1).
+
+    Keeps the mean reward and win rate over the last `window` games, an exponential moving
+    average of the reward and the all-time totals, without storing more than `window` games.
+    """
+
+    def __init__(self, window=100, ema_alpha=0.01):
+        self.window = window
+        self.ema_alpha = ema_alpha
+        self.rewards = deque(maxlen=window)
+        self.wins = deque(maxlen=window)
+        self.reward_sum = 0
+        self.win_sum = 0
+        self.ema = None
+        self.games = 0
+        self.total_reward = 0
+        self.last = None
+
+    def update(self, reward, win):
+        if len(self.rewards) == self.window:
+            self.reward_sum -= self.rewards[0]
+            self.win_sum -= self.wins[0]
+        self.rewards.append(reward)
+        self.wins.append(int(win))
+        self.reward_sum += reward
+        self.win_sum += int(win)
+
+        self.ema = reward if self.ema is None else self.ema + self.ema_alpha * (reward - self.ema)
+        self.games += 1
+        self.total_reward += reward
+        self.last = reward
+
+    @property
+    def full(self):
+        return len(self.rewards) == self.window
+
+    @property
+    def mean(self):
+        return self.reward_sum / len(self.rewards) if self.rewards else 0.0
+
+    @property
+    def win_rate(self):
+        return self.win_sum / len(self.wins) if self.wins else 0.0
+
+    @property
+    def all_time_mean(self):
+        return self.total_reward / self.games if self.games else 0.0
+
+
+class DecimatedHistory:
+    """History of a value with at most max_points points, whatever the number of games.
+
+    Each point is the mean, min and max of `stride` consecutive values. When the points fill
+    up, neighbouring pairs are merged and the stride doubles, so the resolution halves while
+    the whole run stays covered. Appending is amortized O(1) and plotting costs the same at
+    game 10 and at game 10 million.
+    """
+
+    def __init__(self, max_points=1000):
+        if max_points < 2 or max_points % 2:
+            raise ValueError(f"max_points must be an even number of at least 2, got {max_points}")
+        self.max_points = max_points
+        self.stride = 1
+        self.count = 0
+        self.x = []         # index of the middle value of each point
+        self.values = []    # mean of each point
+        self.low = []
+        self.high = []
+
+        # point being filled
+        self._sum = 0
+        self._n = 0
+        self._low = math.inf
+        self._high = -math.inf
+
+    def __len__(self):
+        return len(self.values) + (self._n > 0)
+
+    def append(self, value):
+        self._sum += value
+        self._n += 1
+        self._low = min(self._low, value)
+        self._high = max(self._high, value)
+        self.count += 1
+
+        if self._n == self.stride:
+            self._close_point()
+            if len(self.values) == self.max_points:
+                self._decimate()
+
+    def points(self):
+        """Returns x, mean, low and high of every point, including the one being filled."""
+        if self._n == 0:
+            return self.x, self.values, self.low, self.high
+        return (self.x + [self.count - (self._n + 1) / 2], self.values + [self._sum / self._n],
+                self.low + [self._low], self.high + [self._high])
+
+    def _close_point(self):
+        self.x.append(self.count - (self._n + 1) / 2)
+        self.values.append(self._sum / self._n)
+        self.low.append(self._low)
+        self.high.append(self._high)
+        self._sum, self._n = 0, 0
+        self._low, self._high = math.inf, -math.inf
+
+    def _decimate(self):
+        # all points have the same stride, so pairs merge with equal weights
+        self.x = [(a + b) / 2 for a, b in zip(self.x[::2], self.x[1::2])]
+        self.values = [(a + b) / 2 for a, b in zip(self.values[::2], self.values[1::2])]
+        self.low = [min(a, b) for a, b in zip(self.low[::2], self.low[1::2])]
+        self.high = [max(a, b) for a, b in zip(self.high[::2], self.high[1::2])]
+        self.stride *= 2
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    # the decimated mean and extremes match the raw series
+    history = DecimatedHistory(max_points=8)
+    values = [random.randint(-100, 300) for _ in range(1000)]
+    for value in values:
+        history.append(value)
+    x, means, lows, highs = history.points()
+    assert len(x) <= 9 and history.stride == 128
+    for i in range(len(history.values)):
+        chunk = values[i * history.stride:(i + 1) * history.stride]
+        assert math.isclose(means[i], sum(chunk) / len(chunk)) and lows[i] == min(chunk) and highs[i] == max(chunk)
+        assert x[i] == i * history.stride + (history.stride - 1) / 2
+
+    stats = RollingStats(window=10)
+    for i, value in enumerate(values):
+        stats.update(value, value > 0)
+    assert math.isclose(stats.mean, sum(values[-10:]) / 10) and stats.win_rate == sum(v > 0 for v in values[-10:]) / 10
+    assert math.isclose(stats.all_time_mean, sum(values) / len(values))
+
+    # the cost per update doesn't grow with the number of games
+    history, stats = DecimatedHistory(), RollingStats()
+    for n in (10**4, 10**5, 10**6):
+        start = time.perf_counter()
+        for i in range(n):
+            history.append(i)
+            stats.update(i, i % 2)
+        print(f"{n} games: {(time.perf_counter() - start) / n * 1e9:.0f} ns per game, {len(history)} points")
@@ -0,0 +1,118 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+from agent import Agent, train, seed_worker
+
+# hyperparameters an Agent can be built with
+PARAMS = ('lr', 'gamma', 'batch_size', 'max_memory', 'hidden_size', 'epsilon_games')
+
+# example spec:
+# {
+#     "search": "random",                 # "grid" or "random"
+#     "samples": 32,                      # number of random configurations
+#     "params": {
+#         "lr": {"log_uniform": [1e-4, 1e-2]},
+#         "gamma": [0.8, 0.9, 0.99],
+#         "batch_size": {"int": [64, 4096]},
+#         "hidden_size": [128, 256, 512]
+#     },
+#     "budget": {"games": 2000, "seconds": 600},
+#     "target_win_rate": 0.5,
+#     "win_window": 100,
+#     "seeds": [0]
+# }
+
+
+def _sample(values, rng):
+    if isinstance(values, list):
+        return rng.choice(values)
+    if 'uniform' in values:
+        return rng.uniform(*values['uniform'])
+    if 'log_uniform' in values:
+        low, high = values['log_uniform']
+        return math.exp(rng.uniform(math.log(low), math.log(high)))
+    if 'int' in values:
+        return rng.randint(*values['int'])
+    raise ValueError(f"Unknown parameter range: {values}")
+
+
+def get_configs(spec):
+    params = spec['params']
+    for name in params:
+        if name not in PARAMS:
+            raise ValueError(f"Unknown parameter '{name}', expected one of {PARAMS}")
+
+    if spec.get('search', 'grid') == 'grid':
+        names = list(params)
+        configs = [dict(zip(names, values)) for values in itertools.product(*(params[name] for name in names))]
+    else:
+        rng = random.Random(spec.get('seed', 0))
+        configs = [{name: _sample(values, rng) for name, values in params.items()} for _ in range(spec['samples'])]
+
+    # every configuration runs once per seed
+    return [dict(config, seed=seed) for config in configs for seed in spec.get('seeds', [0])]
+
+
+def run_config(config, budget, target_win_rate, win_window, milestones=()):
+    seed_worker(config['seed'])
+    hyperparameters = {name: value for name, value in config.items() if name in PARAMS}
+    agent = Agent(verbose=False, **hyperparameters)
+    results = train(agent=agent, render=False, plot=False, save_model=False, verbose=False,
+                    max_games=budget.get('games'), max_seconds=budget.get('seconds'),
+                    target_win_rate=target_win_rate, win_window=win_window, milestones=milestones)
+    return dict(config, **results)
+
+
+def _run_config(args):
+    return run_config(*args)
+
+
+def rank(results):
+    # runs that reached the target first, fastest first, then the rest by final win rate
+    return sorted(results, key=lambda result: (result['seconds_to_target'] is None,
+                                               result['seconds_to_target'] or 0,
+                                               -result['win_rate']))
+
+
+def sweep(spec, workers=None, out='sweep_results.csv'):
+    configs = get_configs(spec)
+    budget = spec.get('budget', {'games': 1000})
+    tasks = [(config, budget, spec.get('target_win_rate', 0.5), spec.get('win_window', 100)) for config in configs]
+
+    results = []
+    with mp.Pool(processes=workers or os.cpu_count()) as pool:
+        for result in pool.imap_unordered(_run_config, tasks):
+            results.append(result)
+            print(f"[{len(results)}/{len(tasks)}] " + ', '.join(f"{key}={value}" for key, value in result.items()))
+
+    results = rank(results)
+    with open(out, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Grid or random search over the agent hyperparameters')
+    parser.add_argument('spec', help='json file with the search spec')
+    parser.add_argument('--workers', type=int, default=None, help='parallel runs, defaults to the number of cores')
+    parser.add_argument('--out', default='sweep_results.csv', help='results table, ranked by time to target win rate')
+    args = parser.parse_args()
+
+    with open(args.spec) as file:
+        spec = json.load(file)
+
+    results = sweep(spec, args.workers, args.out)
+
+    print(f"\n{'rank':>4} {'s to target':>11} {'games':>6} {'win rate':>8}  config")
+    for i, result in enumerate(results):
+        seconds = f"{result['seconds_to_target']:.1f}" if result['seconds_to_target'] is not None else '-'
+        config = ', '.join(f"{name}={result[name]}" for name in PARAMS + ('seed',) if name in result)
+        print(f"{i + 1:>4} {seconds:>11} {result['games']:>6} {result['win_rate']:>8.2f}  {config}")
@@ -0,0 +1,121 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# name, type and help of every metric, exported with a maze_ prefix
+METRICS = {
+    'env_steps_total': ('counter', 'Moves played in the environment.'),
+    'episodes_total': ('counter', 'Finished games by result.'),
+    'train_updates_total': ('counter', 'Train steps of the model.'),
+    'train_update_seconds': ('summary', 'Time spent in train steps.'),
+    'replay_transitions': ('gauge', 'Transitions in the replay memory.'),
+    'replay_capacity': ('gauge', 'Capacity of the replay memory.'),
+    'epsilon': ('gauge', 'Exploration epsilon of the agent.'),
+    'win_rate': ('gauge', 'Win rate over the rolling window.'),
+    'mean_reward': ('gauge', 'Mean reward over the rolling window.'),
+    'start_time_seconds': ('gauge', 'Unix time the run started.'),
+}
+
+RESULTS = ('win', 'loss', 'tie')
+
+
+class Telemetry:
+    """Training counters served over HTTP in the Prometheus text format.
+
+    The training loop is the only writer and every key exists from the start, so an update is a
+    plain dict store and a scrape is a dict copy, neither takes a lock. The server runs in a
+    daemon thread and never touches the training state.
+    """
+
+    def __init__(self, port=0, host='127.0.0.1', run='default', verbose=True):
+        self.labels = f'run="{run}"'
+        self.values = {}
+        for name, (kind, _) in METRICS.items():
+            if kind == 'summary':
+                self.values[name + '_sum'] = 0.0
+                self.values[name + '_count'] = 0
+            elif name == 'episodes_total':
+                self.values.update({f'{name}|{result}': 0 for result in RESULTS})
+            else:
+                self.values[name] = 0
+        self.values['start_time_seconds'] = time.time()
+
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        # port 0, the default, picks a free port: fixed ones like node_exporter's 9100 may be taken,
+        # and many runs can share one machine
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f'http://{host}:{self.port}/metrics'
+        if verbose:
+            print(f'Metrics on {self.url}')
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def inc(self, name, value=1):
+        self.values[name] += value
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def observe(self, name, seconds):
+        self.values[name + '_sum'] += seconds
+        self.values[name + '_count'] += 1
+
+    def episode(self, win_condition):
+        result = 'win' if win_condition in (1, 2) else 'tie' if win_condition == 5 else 'loss'
+        self.values[f'episodes_total|{result}'] += 1
+
+    def render(self):
+        values = dict(self.values)
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f'# HELP maze_{name} {help_text}')
+            lines.append(f'# TYPE maze_{name} {kind}')
+            if kind == 'summary':
+                lines.append(f'maze_{name}_sum{{{self.labels}}} {values[name + "_sum"]}')
+                lines.append(f'maze_{name}_count{{{self.labels}}} {values[name + "_count"]}')
+            elif name == 'episodes_total':
+                for result in RESULTS:
+                    lines.append(f'maze_{name}{{{self.labels},result="{result}"}} {values[f"{name}|{result}"]}')
+            else:
+                lines.append(f'maze_{name}{{{self.labels}}} {values[name]}')
+        return '\n'.join(lines) + '\n'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    import argparse
+    from agent import Agent, train
+
+    parser = argparse.ArgumentParser(description='Headless training run with a Prometheus metrics endpoint')
+    parser.add_argument('--port', type=int, default=0, help='0 picks a free port')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--run', default='default', help='run label of every metric')
+    parser.add_argument('--games', type=int, default=None)
+    parser.add_argument('--seconds', type=float, default=None)
+    args = parser.parse_args()
+
+    telemetry = Telemetry(args.port, args.host, args.run)
+    train(agent=Agent(verbose=False), render=False, plot=False, save_model=False,
+          max_games=args.games, max_seconds=args.seconds, telemetry=telemetry)
+    telemetry.close()